@@ -9,21 +9,49 @@ import sounddevice as sd  # To capture audio input/output
 import numpy as np  # For numerical operations (used for audio data)
 import speech_recognition as sr  # For converting speech to text
 from deep_translator import GoogleTranslator  # For performing translations using Google
+from deep_translator import exceptions as translator_errors
+from deep_translator.constants import BASE_URLS as TRANSLATOR_BASE_URLS
+from deep_translator.validate import is_input_valid, request_failed
+import requests  # Keep-alive HTTP sessions for the translator clients
+from bs4 import BeautifulSoup  # For reading the translation out of the Google Translate page
 import threading  # For running tasks concurrently in background threads
+import time
 import queue  # For thread-safe communication between threads
 from scipy.io.wavfile import write, read  # For saving/reading audio files
+from scipy.signal import resample_poly  # For polyphase resampling of captured audio
 from pystray import Icon, Menu, MenuItem  # For creating a system tray icon and menu
 from PIL import Image, ImageDraw, ImageTk  # For image processing and displaying images in the GUI
 import asyncio  # For asynchronous operations, particularly with TTS
 import string
-import difflib  # For comparing text segments and removing overlaps
+import unicodedata  # For script-aware overlap removal
+import difflib  # Reference implementation for the overlap removal benchmark
 import io
 import logging  # For logging messages and errors to a file
-from concurrent.futures import ThreadPoolExecutor  # For managing a pool of background threads
+# For managing a pool of background threads
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from functools import lru_cache  # For building the overlap unit pattern on first use
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Local stand-in for the translator benchmark
+from urllib.parse import parse_qs, urlparse, unquote
+from html.parser import HTMLParser  # Streaming text extraction from EPUB chapters
+import xml.etree.ElementTree as ElementTree  # For reading the EPUB container and package files
+import zipfile
+import mmap  # For reading large text files without loading them into memory
+import codecs  # For checking that a text file is UTF-8 before reading it in blocks
+import posixpath
+import html
 import sys
-from collections import OrderedDict  # For implementing an LRU cache for translations
+import math
+import argparse
+from types import SimpleNamespace  # Stand-in for the PortAudio callback status during replay
+from collections import Counter, OrderedDict, deque  # For implementing an LRU cache for translations
 import pycountry  # For mapping language codes to country names
 import shutil
+import tempfile
+import tracemalloc  # Peak memory of the EPUB reading benchmark
+import sqlite3  # For the persistent translation cache
+import zlib  # Stable hashes for the fuzzy translation memory
+import bisect
 
 # Filter out specific warnings from EbookLib
 warnings.filterwarnings("ignore", category=UserWarning, module="ebooklib.epub")
@@ -31,9 +59,6 @@ warnings.filterwarnings("ignore", category=FutureWarning, module="ebooklib.epub"
 # Written by ChatGPT 01 and 03
 #Tom Moir 1/3/2025
 #tomspeechnz@gmail.com
-# Import modules for reading EPUB files
-from ebooklib import epub
-from bs4 import BeautifulSoup
 
 # On Windows, hide the console window when running a bundled executable
 if os.name == "nt":
@@ -61,87 +86,511 @@ logging.basicConfig(
     filemode='a'
 )
 
+# Translations are cached on disk next to the log file so they survive restarts
+translation_cache_file = os.path.join(os.path.expanduser("~"), "translator_app_cache.sqlite3")
 
-# Function to extract text from an EPUB file
-def epub_to_text(epub_path):
+
+# Elements that start a new line in the extracted EPUB text, and elements whose text is not part of the book
+EPUB_BLOCK_TAGS = {"p", "div", "br", "li", "tr", "dt", "dd", "blockquote", "pre", "section", "article", "aside",
+                   "figcaption", "h1", "h2", "h3", "h4", "h5", "h6"}
+EPUB_SKIPPED_TAGS = {"head", "script", "style"}
+EPUB_CONTAINER_NS = "{urn:oasis:names:tc:opendocument:xmlns:container}"
+EPUB_PACKAGE_NS = "{http://www.idpf.org/2007/opf}"
+EPUB_HTML_TYPES = {"application/xhtml+xml", "text/html"}
+
+
+class EpubTextExtractor(HTMLParser):
     """
-    Reads an EPUB file and returns the concatenated plain text.
+    Collects the text of one EPUB chapter from parser events as the chapter
+    is fed in, without building a document tree. Block elements start a new
+    line; the head, scripts and styles are skipped.
     """
-    try:
-        book = epub.read_epub(epub_path)
-        full_text = ""
-        # Iterate over items and extract text from HTML content
-        for item in book.get_items():
-            if isinstance(item, epub.EpubHtml):
-                soup = BeautifulSoup(item.get_content(), "html.parser")
-                text = soup.get_text(separator="\n").strip()
-                if text:
-                    full_text += text + "\n\n"
-        return full_text
-    except Exception as e:
-        logging.error(f"Error converting EPUB to text: {e}")
-        return ""
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in EPUB_SKIPPED_TAGS:
+            self._skipping += 1
+        elif tag in EPUB_BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in EPUB_BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in EPUB_SKIPPED_TAGS:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in EPUB_BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+    # The chapter text with the markup's indentation and blank lines removed
+    def text(self):
+        lines = (line.strip() for line in "".join(self.parts).splitlines())
+        return "\n".join(line for line in lines if line)
+
+
+# Function to list the chapter files of an EPUB in reading (spine) order
+def epub_chapter_names(book):
+    container = ElementTree.fromstring(book.read("META-INF/container.xml"))
+    rootfile = container.find(f".//{EPUB_CONTAINER_NS}rootfile")
+    package_path = rootfile.get("full-path")
+    package = ElementTree.fromstring(book.read(package_path))
+    base = posixpath.dirname(package_path)
+    manifest = {}
+    for item in package.iter(f"{EPUB_PACKAGE_NS}item"):
+        # The navigation document only repeats the table of contents
+        if item.get("media-type") in EPUB_HTML_TYPES and "nav" not in item.get("properties", "").split():
+            manifest[item.get("id")] = posixpath.normpath(posixpath.join(base, unquote(item.get("href"))))
+    spine = [manifest[ref.get("idref")] for ref in package.iter(f"{EPUB_PACKAGE_NS}itemref")
+             if ref.get("idref") in manifest]
+    # Books without a usable spine are read in manifest order
+    return spine or list(manifest.values())
+
+
+# Generator that extracts the text of an EPUB file one chapter at a time, in reading order. Each chapter is
+# decompressed and parsed in chunks as it is reached, so memory use follows the largest chapter, not the book
+def iter_epub_chapters(epub_path, chunk_chars=65536):
+    with zipfile.ZipFile(epub_path) as book:
+        for name in epub_chapter_names(book):
+            extractor = EpubTextExtractor()
+            with book.open(name) as raw, io.TextIOWrapper(raw, encoding="utf-8", errors="replace") as chapter:
+                while True:
+                    chunk = chapter.read(chunk_chars)
+                    if not chunk:
+                        break
+                    extractor.feed(chunk)
+            extractor.close()
+            text = extractor.text()
+            if text:
+                yield text
+
+
+# Generator that yields the reading segments of an EPUB file chapter by chapter
+def iter_epub_segments(epub_path):
+    for text in iter_epub_chapters(epub_path):
+        yield from iter_text_segments(text)
+
+
+# Sentence end marks: ., !, ?, the ellipsis, the full stops and question marks of Devanagari, Arabic, Urdu,
+# Armenian, Ethiopic, Myanmar and Khmer, and the CJK full stops. Closing quotes and brackets after the mark stay
+# with the sentence (the group). One character class up front lets the regex engine skip quickly to candidates
+SENTENCE_END_PATTERN = re.compile(r'([.!?\u2026\u0964\u0965\u061f\u06d4\u0589\u1362\u1367\u104b\u17d4'
+                                  r'\u3002\uff01\uff1f][)\]"\'\u00bb\u2019\u201d\u300d\u300f\uff09]*)\s*')
+# CJK full stops end a sentence without a space after them
+CJK_SENTENCE_ENDS = "\u3002\uff01\uff1f"
+
+
+# Generator of the sentences of text in order, with the whitespace between them removed
+def iter_sentences(text):
+    start = 0
+    for match in SENTENCE_END_PATTERN.finditer(text):
+        end = match.end(1)
+        # Other marks only end a sentence before a space, not in "3.14" or "e.g.,"
+        if end == match.end() and text[match.start()] not in CJK_SENTENCE_ENDS:
+            continue
+        yield text[start:end]
+        start = match.end()
+    yield text[start:]
+
+
+# Function to split text into sentences, so each can be translated and cached on its own
+def split_sentences(text):
+    return [sentence for sentence in (part.strip() for part in iter_sentences(text)) if sentence]
+
+
+# Letters of scripts written without spaces between words (Thai, Lao, Myanmar, Khmer, Chinese, Japanese), and
+# the same with their punctuation and quotes: two such pieces are merged without a space between them
+UNSPACED_LETTER_PATTERN = re.compile(r'[\u0e00-\u0eff\u1000-\u109f\u1780-\u17ff\u3040-\u30ff\u3400-\u4dbf'
+                                     r'\u4e00-\u9fff\uf900-\ufaff]')
+UNSPACED_CHARACTER_PATTERN = re.compile(r'[\u0e00-\u0eff\u1000-\u109f\u1780-\u17ff\u2018-\u201d\u3000-\u30ff'
+                                        r'\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]')
+
+
+# Generator that cuts the words of an over-long sentence into pieces of at most max_words words and about
+# max_chars characters. Words longer than max_chars (scripts written without spaces) are cut themselves.
+# Yields (piece, word count)
+def split_long_sentence(words, max_words, max_chars):
+    piece = []
+    length = 0
+    for word in words:
+        while len(word) > max_chars:
+            if piece:
+                yield " ".join(piece), len(piece)
+                piece, length = [], 0
+            yield word[:max_chars], 1
+            word = word[max_chars:]
+        if piece and (len(piece) == max_words or length + len(word) > max_chars):
+            yield " ".join(piece), len(piece)
+            piece, length = [], 0
+        piece.append(word)
+        length += len(word) + 1
+    if piece:
+        yield " ".join(piece), len(piece)
+
+
+# Generator that splits text into reading segments in a single pass. Sentences longer than fallback_word_count
+# words or fallback_chars characters are cut into pieces, and short pieces are merged into their neighbours as
+# they arrive, as the previous two-pass segmenter did. In scripts written without spaces, about three letters count
+# as two words
+def iter_text_segments(text, fallback_word_count=300, min_word_count=3, min_char_threshold=4,
+                       fallback_chars=2000):
+    current = None
+    current_words = 0
+    for sentence in iter_sentences(text):
+        words = sentence.split()
+        if not words:
+            continue
+        if len(words) <= fallback_word_count and len(sentence) <= fallback_chars:
+            pieces = ((sentence.strip(), len(words)),)
+        else:
+            pieces = split_long_sentence(words, fallback_word_count, fallback_chars)
+        for piece, word_count in pieces:
+            if word_count < min_word_count and UNSPACED_LETTER_PATTERN.search(piece):
+                word_count = max(word_count, 2 * len(UNSPACED_LETTER_PATTERN.findall(piece)) // 3)
+            short = word_count < min_word_count
+            if not short and " " not in piece:
+                # A single short word, such as a chapter number
+                token = piece.replace(".", "")
+                short = token.isalpha() and len(token) <= min_char_threshold
+            if current is None:
+                current, current_words, current_short = piece, word_count, short
+            elif short or current_short:
+                # Short pieces join the segment before them; only a short first segment joins the one after it
+                unspaced = UNSPACED_CHARACTER_PATTERN.match(current[-1]) and UNSPACED_CHARACTER_PATTERN.match(piece)
+                current += ("" if unspaced else " ") + piece
+                current_words += word_count
+                current_short = current_words < min_word_count
+            else:
+                yield current
+                current, current_words, current_short = piece, word_count, False
+    if current is not None:
+        yield current
+
+
+# Generator that adds each segment from source to the segments list before yielding it
+def append_segments(segments, source):
+    for segment in source:
+        segments.append(segment)
+        yield segment
+
+
+# Places to end a block of a text file, in order of preference: paragraph breaks, line breaks (Unix, Windows or
+# old Mac), sentence ends, then spaces
+BLOCK_SEPARATORS = (
+    (b"\n\n", b"\n\r\n", b"\r\r"),
+    (b"\n", b"\r"),
+    (b". ", b"! ", b"? ") + tuple(mark.encode("utf-8") for mark in CJK_SENTENCE_ENDS),
+    (b" ", b"\t"),
+)
 
 
-# Function to merge segments that are too short to improve readability/translation
-def merge_short_segments(segments, min_word_count=3, min_char_threshold=4):
+class MappedTextSegments:
     """
-    Merges short text segments to avoid poor translation results.
+    The reading segments of a UTF-8 text file, read through a memory map.
+    scan() splits the file one block at a time and keeps only the byte range
+    and first segment number of each block. When a segment is needed, its
+    block is decoded and split again; the last few blocks used are cached.
+    Indexing and slicing work as on a list of segments, from any thread.
     """
-    segments = [s.strip() for s in segments if s.strip()]
-    if not segments:
+
+    def __init__(self, path, block_bytes=1 << 16, cached_blocks=4):
+        self.block_bytes = block_bytes
+        self.cached_blocks = cached_blocks
+        self._blocks = []  # (start, end) byte offsets of each scanned block
+        self._firsts = []  # Number of the first segment of each block
+        self._count = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        with open(path, "rb") as f:
+            self.size = os.fstat(f.fileno()).st_size
+            # An empty file cannot be mapped
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        try:
+            self._check_encoding()
+        except UnicodeDecodeError:
+            self.close()
+            raise
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("segment index out of range")
+        with self._lock:
+            block = bisect.bisect_right(self._firsts, index) - 1
+            return self._block_segments(block)[index - self._firsts[block]]
+
+    def __iter__(self):
+        block = 0
+        while block < len(self._blocks):
+            with self._lock:
+                segments = self._block_segments(block)
+            yield from segments
+            block += 1
+
+    def scan(self):
+        """
+        Generator that splits the file one block at a time. The segments of
+        a block can be indexed before the first of them is yielded.
+        """
+        start = 0
+        while start < self.size:
+            end = self._block_end(start)
+            segments = list(iter_text_segments(self._decode(start, end)))
+            with self._lock:
+                self._blocks.append((start, end))
+                self._firsts.append(self._count)
+                self._count += len(segments)
+                self._remember(len(self._blocks) - 1, segments)
+            yield from segments
+            start = end
+
+    # End of the block starting at start: the last paragraph break in the second half of the block, else the
+    # last line break, sentence end or space there, and only if there is none of these the start of a UTF-8
+    # character
+    def _block_end(self, start):
+        end = start + self.block_bytes
+        if end >= self.size:
+            return self.size
+        for separators in BLOCK_SEPARATORS:
+            position = max(self._map.rfind(separator, start + self.block_bytes // 2, end) + len(separator)
+                           for separator in separators)
+            if position > start + self.block_bytes // 2:
+                # Keep a Windows line end in one piece
+                if self._map[position - 1:position] == b"\r" and self._map[position:position + 1] == b"\n":
+                    position += 1
+                return position
+        while self._map[end] & 0xC0 == 0x80:
+            end -= 1
+        return end
+
+    # Decode the whole file once, a chunk at a time, so a file that is not UTF-8 is refused before any of it is
+    # shown rather than failing partway through scan(). Raises UnicodeDecodeError
+    def _check_encoding(self, chunk_bytes=1 << 20):
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        for start in range(0, self.size, chunk_bytes):
+            decoder.decode(self._map[start:start + chunk_bytes])
+        decoder.decode(b"", final=True)
+
+    # Text of a byte range, with Windows and old Mac line ends turned into \n as when reading in text mode
+    def _decode(self, start, end):
+        return self._map[start:end].decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+    # The segments of a scanned block, from the cache or split again (called with the lock held)
+    def _block_segments(self, block):
+        segments = self._cache.get(block)
+        if segments is None:
+            start, end = self._blocks[block]
+            segments = list(iter_text_segments(self._decode(start, end)))
+            self._remember(block, segments)
+        else:
+            self._cache.move_to_end(block)
         return segments
 
-    def is_too_short(seg):
-        # Check if segment has fewer than the minimum word count
-        if len(seg.split()) < min_word_count:
-            return True
-        # Also check if segment is a single short word
-        token = seg.replace(".", "")
-        if " " not in seg and token.isalpha() and len(token) <= min_char_threshold:
-            return True
-        return False
+    def _remember(self, block, segments):
+        self._cache[block] = segments
+        if len(self._cache) > self.cached_blocks:
+            self._cache.popitem(last=False)
 
-    merged = []
-    for seg in segments:
-        if is_too_short(seg):
-            if merged:
-                merged[-1] += " " + seg
-            else:
-                merged.append(seg)
-        else:
-            merged.append(seg)
+    def close(self):
+        """
+        Unmaps the file, so it can be changed or deleted again on Windows.
+        Segments already cached stay readable.
+        """
+        with self._lock:
+            if isinstance(self._map, mmap.mmap):
+                self._map.close()
+            self._map = b""
+            self.size = 0
 
-    final = []
-    i = 0
-    while i < len(merged):
-        seg = merged[i]
-        if is_too_short(seg) and i + 1 < len(merged):
-            new_seg = seg + " " + merged[i + 1]
-            final.append(new_seg)
-            i += 2
-        else:
-            final.append(seg)
-            i += 1
-    return final
 
+# Largest request sent when several texts are packed into one translation call (the service limit is 5000)
+TRANSLATION_PACK_CHARS = 4800
 
-# Function to split text into segments using punctuation as a delimiter
-def split_text_with_fallback(text, fallback_word_count=300):
+
+# Function to split a packed translation back into one translation per source line
+def unpack_translations(response, lines, max_ratio_spread=4.0):
     """
-    Splits text into segments based on punctuation. If a segment is too long,
-    it is further split by word count.
+    Returns the translated lines, or None if they do not line up with the
+    source lines: a different line count, or a line whose length is far out of
+    proportion with the rest (a sign that lines were merged and split elsewhere).
     """
-    raw_segments = re.split(r'(?<=[.!?])\s+', text)
-    new_segments = []
-    for seg in raw_segments:
-        words = seg.split()
-        if len(words) > fallback_word_count:
-            for i in range(0, len(words), fallback_word_count):
-                new_segments.append(" ".join(words[i:i + fallback_word_count]))
-        else:
-            new_segments.append(seg)
-    return new_segments
+    if not response:
+        return None
+    translations = [line.strip() for line in response.split("\n") if line.strip()]
+    if len(translations) != len(lines):
+        return None
+    overall_ratio = sum(len(line) for line in translations) / max(1, sum(len(line) for line in lines))
+    for line, translation in zip(lines, translations):
+        if len(line) >= 20:
+            ratio = len(translation) / len(line) / overall_ratio
+            if not 1 / max_ratio_spread <= ratio <= max_ratio_spread:
+                return None
+    return translations
+
+
+# Code point ranges of the scripts used for language identification (Latin is handled separately)
+LANGUAGE_ID_SCRIPT_RANGES = [
+    (0x0370, 0x03FF, "Greek"), (0x0400, 0x04FF, "Cyrillic"), (0x0530, 0x058F, "Armenian"),
+    (0x0590, 0x05FF, "Hebrew"), (0x0600, 0x06FF, "Arabic"), (0x0750, 0x077F, "Arabic"),
+    (0x0900, 0x097F, "Devanagari"), (0x0980, 0x09FF, "Bengali"), (0x0A00, 0x0A7F, "Gurmukhi"),
+    (0x0A80, 0x0AFF, "Gujarati"), (0x0B00, 0x0B7F, "Odia"), (0x0B80, 0x0BFF, "Tamil"), (0x0C00, 0x0C7F, "Telugu"),
+    (0x0C80, 0x0CFF, "Kannada"), (0x0D00, 0x0D7F, "Malayalam"), (0x0D80, 0x0DFF, "Sinhala"), (0x0E00, 0x0E7F, "Thai"),
+    (0x0E80, 0x0EFF, "Lao"), (0x1000, 0x109F, "Myanmar"), (0x10A0, 0x10FF, "Georgian"), (0x1100, 0x11FF, "Hangul"),
+    (0x1200, 0x137F, "Ethiopic"), (0x1780, 0x17FF, "Khmer"), (0x3040, 0x30FF, "Kana"), (0x3130, 0x318F, "Hangul"),
+    (0x4E00, 0x9FFF, "Han"), (0xAC00, 0xD7AF, "Hangul"), (0xFB50, 0xFDFF, "Arabic"), (0xFE70, 0xFEFF, "Arabic"),
+]
+LANGUAGE_ID_SCRIPT_STARTS = [low for low, _, _ in LANGUAGE_ID_SCRIPT_RANGES]
+
+# Scripts that identify the language on their own
+SINGLE_LANGUAGE_SCRIPTS = {
+    "Greek": "el", "Armenian": "hy", "Bengali": "bn", "Gurmukhi": "pa", "Gujarati": "gu", "Odia": "or", "Tamil": "ta",
+    "Telugu": "te", "Kannada": "kn", "Malayalam": "ml", "Sinhala": "si", "Thai": "th", "Lao": "lo", "Myanmar": "my",
+    "Georgian": "ka", "Hangul": "ko", "Ethiopic": "am", "Khmer": "km", "Kana": "ja",
+}
+
+# Characters written differently in Simplified and Traditional Chinese
+SIMPLIFIED_CHINESE_CHARS = set("们这说时对会来为国经过发后于还门么样问开关长现个没里话让进学气书东车见")
+TRADITIONAL_CHINESE_CHARS = set("們這說時對會來為國經過發後於還門麼樣問開關長現個沒裡話讓進學氣書東車見")
+
+# Frequent words of the languages that share a script; their character 1- to 3-grams are the identification model
+LANGUAGE_ID_WORDS = {
+    "Latin": {
+        "en": "the of and to in is that it was for on are with as his they be at one have this from or had by but "
+              "not what all were we when your can said there an each which she do how their if will up about out "
+              "then them these so some her would make like him into has more could people my than been who now "
+              "going being something nothing thing things during making looking coming asked looked called wanted "
+              "himself herself should must little very just over also after where before through back only well "
+              "even because any give most us young long old great new good right think know every",
+        "fr": "le la les de des du un une et est en que qui dans pour pas sur au aux avec ce cette il elle ils nous "
+              "vous je ne se sont par plus mais ou où son sa ses leur été être avoir fait comme tout très bien aussi",
+        "de": "der die das und ist nicht ein eine zu den von mit sich des auf für im dem auch es an werden aus er hat "
+              "dass sie nach wird bei einer um am sind noch wie einem über so zum war haben nur oder aber vor zur "
+              "bis mehr durch man ich wir",
+        "es": "el la los las de del que y en un una es por con para no se su al lo como más pero sus le ya fue este "
+              "ha porque esta entre cuando muy sin sobre también me hasta hay donde quien desde todo nos uno ni eso",
+        "it": "il la le lo gli di del della che e è un una per non con sono si da in al alla dei delle come anche "
+              "più ma ha questo questa nel nella era essere tutto molto cosa perché io noi loro",
+        "pt": "o a os as de do da dos das que e é um uma para com não por em no na se mais como mas ao foi ele ela "
+              "seu sua são também muito já está isso eu você nós quando",
+        "nl": "de het een en van is dat in te die niet op zijn met voor er maar ook als aan bij om dan nog wat je ik "
+              "we hij zij was worden heeft naar uit door deze kan hebben al wel",
+        "sv": "och att det som en på är av för med till den har de inte om ett han men var jag sig från vi så kan "
+              "man när år hon under också efter eller nu sin där vid blev vara varit hur något vill kunna många "
+              "mycket denna detta några",
+        "da": "og i at det er en til på som de med han af for ikke der var mig sig men et har om vi min havde ham "
+              "hun nu over da fra du ud sin dem os op hvad skal også blev kan være været hvor hvis noget efter vil "
+              "kunne mange meget denne dette nogle",
+        "no": "og i det er en til på som å for med han av ikke der var jeg seg men et har om vi min hadde ham hun nå "
+              "over da fra du ut sin dem oss opp hva skal også ble kan være vært hvor hvis noe etter vil kunne mange "
+              "mye denne dette noen meg deg ikkje",
+        "fi": "ja on ei se että hän oli ovat mutta kun niin kuin tai myös jo vain sen tämä joka olla hänen minä me "
+              "te he mitä mikä kanssa ole olen olemme",
+        "pl": "i w nie na się z że do to jest jak co po ale tak o od jego za czy już przez jej był być może tylko "
+              "tym sobie dla są bardzo jednak ich ten ta",
+        "cs": "a v se na je že to s z do o jak ale po jsem by jsou tak i k za od jeho které který když už jen bylo "
+              "být jako pro nebo není aby ve",
+        "sk": "a v sa na je že to s z do o ako ale po som by sú tak i k za od jeho ktoré ktorý keď už len bolo byť "
+              "pre alebo nie aby vo",
+        "hu": "a az és hogy nem is egy meg van de csak ez mint már volt vagy ki még el sem lesz után amely mert "
+              "nagyon minden",
+        "ro": "și în de la a cu pe că nu un o este din care se mai pentru au fost ce sunt sau dar lui ei acest "
+              "această fi",
+        "tr": "ve bir bu da de için ile ne çok daha olarak ama gibi en kadar var mı o ben sen biz onlar olan değil "
+              "her şey sonra",
+        "id": "yang dan di itu dengan untuk tidak ini dari dalam akan pada juga ke karena tersebut bisa ada mereka "
+              "kami saya kita sudah oleh atau",
+        "hr": "i je u da se na za su od ne a s što kao to ali bi iz sam o biti ima koji kako će bio samo nije već",
+        "sl": "in je v da se na za so od ne a s kot to ali bi iz sem o biti ima ki kako bo bil samo ni že",
+        "et": "ja on ei see et oli ka kui mis ta ma nad aga ole siis nii kes seda oma veel pole",
+        "lv": "un ir ar ka no uz par kas arī tas bet to es viņš viņa nav bija lai kā vai",
+        "lt": "ir yra kad su į iš ne tai bet kaip jis ji buvo o per apie tik dar",
+        "ca": "el la els les de del que i en un una és per amb no es com més però al seu va ha dels aquest",
+        "tl": "ang ng mga sa na at ay si ni ko mo ito hindi siya para kung may ako ka namin",
+        "sw": "na ya wa kwa ni katika za la kuwa hii hiyo lakini sana yake kama pia wao mimi",
+        "vi": "và của là có không một những các được trong cho người này đã với để khi",
+        "ga": "an na agus is ar i le go a ní bhí sé sí tá ach mar seo",
+        "cy": "y yn a ar i o yr ei mae ac gyda wedi bod am hyn fel ond",
+        "is": "og að er í á það sem ekki við hann til var með um fyrir en af hún þetta",
+        "eu": "eta da ez bat du ere baina zen dira izan hori hau dute bere edo",
+        "gl": "o a os as de do da que e é un unha en para con non por no na se máis como pero",
+        "af": "die en van is in het nie dat ek was met vir op te sy wat ons hy sal om",
+        "sq": "dhe të në e një për që me nga është nuk i u si por ka ky kjo",
+        "eo": "la kaj de en estas al ne por kun mi vi li ŝi ni ili sed kiu tio",
+        "la": "et in est non ad cum ut sed quod qui quae esse enim etiam atque sunt",
+        "mt": "il u ta li fil għal ma huwa hija dan din minn kien jew",
+        "az": "və bu bir da də ki ilə üçün olan çox mən sən o biz onlar deyil",
+    },
+    "Cyrillic": {
+        "ru": "и в не на я что он с как а то все она так его но да ты к у же вы за бы по только ее мне было вот от "
+              "меня еще нет о из ему теперь когда это был была были быть который которые очень может нужно где "
+              "потому только после уже есть",
+        "uk": "і в не на я що він з як а то все вона так його але та ти до у же ви за б по тільки її мені було ось "
+              "від мене ще немає про із йому коли",
+        "be": "і ў не на я што ён з як а то ўсё яна так яго але ты да у ж вы за б па толькі яе мне было вось ад "
+              "мяне яшчэ няма пра",
+        "bg": "и в не на да се е че с за от по като ще са то но какво той тя тук аз ти ние това съм със към които "
+              "който много може трябва където защото всички само след когато вече беше бях има няма",
+        "mk": "и во не на да се е дека со за од по како ќе тоа но што тој таа тука јас ти ние",
+        "sr": "и у не на да се је што са за од по као ће су то али шта он она ту ја ти ми",
+        "kk": "және бұл бір мен сен ол біз да де үшін осы деп болып керек жоқ бар",
+        "mn": "нь юм бол ба энэ тэр би бид гэж байна байсан биш нэг",
+        "ky": "жана бул бир мен сен ал биз да үчүн бар жок деп болуп",
+        "tg": "ва дар ин аз ба бо як он ки мо шумо ман ҳам барои",
+        "tt": "һәм бу бер мин син ул без да дә өчен юк бар",
+    },
+    "Arabic": {
+        "ar": "في من على أن إلى عن مع هذا هذه كان التي الذي ما لا هو هي قد كل بين",
+        "fa": "و در به از که این را با است برای آن یک خود تا می شود بود نیز",
+        "ur": "کے میں کی ہے اور سے کو نے یہ کہ پر ایک ہیں تھا بھی",
+        "ps": "د او په چې له یې دا هم ته کې سره دی",
+    },
+    "Devanagari": {
+        "hi": "के है में की और से को का एक यह पर हैं कि भी था नहीं",
+        "mr": "आणि आहे या हे की व ते त्या एक मी आम्ही नाही होते",
+        "ne": "र छ को मा यो पनि हो गर्न भएको थियो छन् लागि",
+    },
+    "Hebrew": {
+        "iw": "של את על זה לא הוא היא עם כי אני מה גם",
+        "yi": "און איז דער די דאָס ניט מיט פֿון",
+    },
+}
+
+# Letters each language uses beyond a-z (Latin script) or its whole alphabet (Cyrillic script); a letter outside a
+# language's alphabet counts strongly against it
+LANGUAGE_ID_LETTERS = {
+    "Latin": {
+        "en": "", "fr": "àâæçéèêëîïôœùûüÿ", "de": "äöüß", "es": "áéíñóúü", "it": "àèéìíîòóùú", "pt": "áâãàçéêíóôõú",
+        "nl": "éëïóöü", "sv": "åäöé", "da": "æøåé", "no": "æøåéò", "fi": "äöå", "pl": "ąćęłńóśźż",
+        "cs": "áčďéěíňóřšťúůýž", "sk": "áäčďéíĺľňóôŕšťúýž", "hu": "áéíóöőúüű", "ro": "ăâîșțşţ", "tr": "çğıöşüâî",
+        "id": "é", "hr": "čćđšž", "sl": "čšž", "et": "äöõüšž", "lv": "āčēģīķļņšūž", "lt": "ąčęėįšųūž",
+        "ca": "àçéèíïòóúü", "tl": "ñ", "sw": "", "ga": "áéíóú", "cy": "âêîôûŵŷáéíóúàèìòùäëïöüÿ", "is": "áðéíóúýþæö",
+        "eu": "ñ", "gl": "áéíóúñü", "af": "êëéèôûîï", "sq": "çë", "eo": "ĉĝĥĵŝŭ", "la": "", "mt": "ċġħżàèìòù",
+        "az": "çəğıöşü",
+        "vi": "àáâãèéêìíòóôõùúýăđĩũơưạảấầẩẫậắằẳẵặẹẻẽếềểễệỉịọỏốồổỗộớờởỡợụủứừửữựỳỵỷỹ",
+    },
+    "Cyrillic": {
+        "ru": "абвгдеёжзийклмнопрстуфхцчшщъыьэюя", "uk": "абвгґдеєжзиіїйклмнопрстуфхцчшщьюя",
+        "be": "абвгдеёжзійклмнопрстуўфхцчшыьэюя", "bg": "абвгдежзийклмнопрстуфхцчшщъьюя",
+        "mk": "абвгдѓежзѕијклљмнњопрстќуфхцчџш", "sr": "абвгдђежзијклљмнњопрстћуфхцчџш",
+        "kk": "аәбвгғдеёжзийкқлмнңоөпрстуұүфхһцчшщъыіьэюя", "mn": "абвгдеёжзийклмноөпрстуүфхцчшщъыьэюя",
+        "ky": "абвгдеёжзийклмнңоөпрстуүфхцчшщъыьэюя", "tg": "абвгғдеёжзиӣйкқлмнопрстуӯфхҳчҷшъэюя",
+        "tt": "абвгдеёжзийклмнопрстуфхцчшщъыьэюяәөүҗңһ",
+    },
+}
 
 
 # Function to split long text for TTS into chunks of a maximum length
@@ -166,24 +615,1515 @@ def split_text_for_tts(text, max_len=2000):
     return chunks
 
 
+# Function to resample int16 audio to the rate the recognizer expects
+def resample_audio(samples, source_rate, target_rate):
+    """
+    Resamples int16 audio with a polyphase filter and returns int16 samples.
+    Audio is never upsampled, since that only adds bytes without adding information.
+    """
+    if not target_rate or target_rate >= source_rate:
+        return samples
+    divisor = math.gcd(int(source_rate), int(target_rate))
+    up = int(target_rate) // divisor
+    down = int(source_rate) // divisor
+    resampled = resample_poly(samples.astype(np.float32), up, down)
+    np.clip(resampled, -32768, 32767, out=resampled)
+    return resampled.astype(np.int16)
+
+
+# Code point ranges of scripts written without spaces between words (Thai, Lao, Tibetan, Myanmar, Khmer, CJK)
+UNSPACED_SCRIPT_RANGES = (
+    (0x0E00, 0x0FFF), (0x1000, 0x109F), (0x1780, 0x17FF), (0x2E80, 0x2FDF), (0x3040, 0x31FF),
+    (0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xF900, 0xFAFF), (0xFF66, 0xFF9F), (0x20000, 0x3134F),
+)
+
+
+# Build a regex character class from (low, high) code point ranges
+def regex_char_ranges(ranges):
+    return "".join(f"\\U{low:08x}-\\U{high:08x}" if low != high else f"\\U{low:08x}" for low, high in ranges)
+
+
+# Function to list the code point ranges of combining marks (vowel signs, tone marks, accents)
+def combining_mark_ranges(limit=0x10000):
+    ranges = []
+    for code in range(limit):
+        if unicodedata.category(chr(code))[0] == "M":
+            if ranges and ranges[-1][1] == code - 1:
+                ranges[-1][1] = code
+            else:
+                ranges.append([code, code])
+    return ranges
+
+
+# Pattern matching one overlap unit: a grapheme of an unspaced script, or a word (letters, digits and marks) of any
+# other script. Built on first use, since listing the combining marks scans the whole Basic Multilingual Plane
+@lru_cache(maxsize=None)
+def overlap_unit_pattern():
+    unspaced_class = regex_char_ranges(UNSPACED_SCRIPT_RANGES)
+    mark_class = regex_char_ranges(combining_mark_ranges())
+    return re.compile(f"[{unspaced_class}][{mark_class}]*|(?:[^\\W_{unspaced_class}]|[{mark_class}])+")
+
+
+# Function to split text into comparable units for overlap detection
+def split_overlap_units(text):
+    """
+    Splits text into case-folded units: whole words for scripts written with
+    spaces, single graphemes (a character plus its combining marks) for scripts
+    written without them. Punctuation, symbols and spaces only separate units.
+    Returns (units, ends) with the end offset of each unit in text.
+    """
+    matches = list(overlap_unit_pattern().finditer(text))
+    return [match.group().casefold() for match in matches], [match.end() for match in matches]
+
+
+# Function to return the last few units of recognized text, kept for overlap detection
+def overlap_tail(text, min_units=5, min_chars=12):
+    text = unicodedata.normalize("NFC", text)
+    matches = list(overlap_unit_pattern().finditer(text))
+    chars = 0
+    for count, match in enumerate(reversed(matches), 1):
+        chars += len(match.group())
+        if count >= min_units and chars >= min_chars:
+            return text[match.start():]
+    return text
+
+
+# Function to find the longest run of units shared by two unit lists
+def longest_common_run(first, second, seed_length=2, max_candidates=8):
+    """
+    Returns (start_in_first, start_in_second, length) of the longest common run
+    of at least seed_length units, or (0, 0, 0). The last max_candidates
+    positions of each seed_length-gram of first go into a hash table. One pass
+    over second looks up its n-grams and extends each hit forward, skipping
+    hits inside a run already extended. Keeping only the last few positions
+    favours runs near the end of first, where an overlap is, and keeps
+    repetitive text (the same word many times) from taking quadratic time. A
+    run is missed only if each of its n-grams occurs more than max_candidates
+    times after it in first.
+    """
+    if len(first) < seed_length or len(second) < seed_length:
+        return 0, 0, 0
+    seeds = {}
+    for index, gram in enumerate(zip(*(first[offset:] for offset in range(seed_length)))):
+        seeds.setdefault(gram, deque(maxlen=max_candidates)).append(index)
+    best = (0, 0, 0)
+    run_ends = {}  # Diagonal (candidate - start) -> end in second of the last run extended on it
+    for start, gram in enumerate(zip(*(second[offset:] for offset in range(seed_length)))):
+        candidates = seeds.get(gram)
+        if candidates is None:
+            continue
+        for candidate in candidates:
+            # Already covered by a run extended from an earlier seed on this diagonal
+            if start < run_ends.get(candidate - start, 0):
+                continue
+            length = seed_length
+            limit = min(len(first) - candidate, len(second) - start)
+            while length < limit and first[candidate + length] == second[start + length]:
+                length += 1
+            run_ends[candidate - start] = start + length
+            if length > best[2]:
+                best = (candidate, start, length)
+    return best
+
+
+# Function to remove text that repeats the tail of the previous recognition
+def remove_text_overlap(new_text, previous_tail, min_units=2, min_chars=4):
+    """
+    Drops everything in new_text up to the end of the longest run it shares with
+    previous_tail, if that run is at least min_units units and min_chars characters long.
+    Works for any script offered in the language list.
+    """
+    new_text = unicodedata.normalize("NFC", new_text)
+    tail_units = overlap_unit_pattern().findall(unicodedata.normalize("NFC", previous_tail).casefold())
+    new_units, new_ends = split_overlap_units(new_text)
+    if not tail_units or not new_units:
+        return new_text
+    _, start, length = longest_common_run(tail_units, new_units, seed_length=min_units)
+    if not length or sum(len(unit) for unit in new_units[start:start + length]) < min_chars:
+        return new_text
+    return new_text[new_ends[start + length - 1]:].lstrip()
+
+
+# Fixed-capacity int16 ring buffer for captured audio
+class AudioRingBuffer:
+    """
+    Preallocated ring buffer holding captured audio as int16 samples.
+    Every sample is written twice (at i and i + capacity) so that any window
+    up to the capacity can be returned as a contiguous, zero-copy view.
+    """
+
+    def __init__(self, capacity, max_block=4096):
+        self.capacity = int(capacity)
+        self._data = np.zeros(2 * self.capacity, dtype=np.int16)
+        self._scratch = np.empty(max_block, dtype=np.float32)
+        self._write_pos = 0  # Total number of samples ever written
+        self._start = 0  # Absolute position of the first sample in the current window
+
+    def __len__(self):
+        return self._write_pos - self._start
+
+    def write(self, samples, gain=1.0):
+        """
+        Scales float samples in [-1, 1] by gain, converts them to int16 and
+        appends them. The oldest samples are dropped once capacity is reached.
+        """
+        n = len(samples)
+        if n == 0:
+            return
+        if n > len(self._scratch):
+            self._scratch = np.empty(n, dtype=np.float32)
+        scratch = self._scratch[:n]
+        np.multiply(samples, gain * 32767.0, out=scratch, casting="unsafe")
+        np.clip(scratch, -32768, 32767, out=scratch)
+        if n > self.capacity:
+            scratch = scratch[-self.capacity:]
+            self._write_pos += n - self.capacity
+            n = self.capacity
+        pos = self._write_pos % self.capacity
+        first = min(n, self.capacity - pos)
+        self._data[pos:pos + first] = scratch[:first]
+        self._data[pos + self.capacity:pos + self.capacity + first] = scratch[:first]
+        if first < n:
+            rest = n - first
+            self._data[:rest] = scratch[first:]
+            self._data[self.capacity:self.capacity + rest] = scratch[first:]
+        self._write_pos += n
+        if len(self) > self.capacity:
+            self._start = self._write_pos - self.capacity
+
+    def window(self):
+        """
+        Returns a read-only view of the samples currently buffered.
+        """
+        start = self._start % self.capacity
+        view = self._data[start:start + len(self)]
+        view.flags.writeable = False
+        return view
+
+    def retain(self, count):
+        """
+        Keeps only the most recent count samples (the overlap for the next window).
+        """
+        self._start = self._write_pos - max(0, min(int(count), len(self)))
+
+    def clear(self):
+        self._start = self._write_pos
+
+
+# Lock-free single-producer/single-consumer queue of captured audio blocks
+class AudioBlockQueue:
+    """
+    Hands audio blocks from the PortAudio callback to the capture thread.
+    Blocks are copied into preallocated slots; the producer only advances the
+    tail index and the consumer only advances the head index, so neither side
+    ever takes a lock. Blocks arriving while the queue is full are counted as dropped.
+    """
+
+    def __init__(self, slots, block_size):
+        self.capacity = slots
+        self._slots = np.zeros((slots, block_size), dtype=np.float32)
+        self._frames = [0] * slots
+        self._head = 0
+        self._tail = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self._tail - self._head
+
+    def put(self, block):
+        """
+        Producer side: copies the block into the next free slot. Returns False if full.
+        """
+        tail = self._tail
+        if tail - self._head >= len(self._slots):
+            self.dropped += 1
+            return False
+        slot = tail % len(self._slots)
+        frames = min(len(block), self._slots.shape[1])
+        self._slots[slot, :frames] = block[:frames]
+        self._frames[slot] = frames
+        self._tail = tail + 1
+        return True
+
+    def peek(self):
+        """
+        Consumer side: returns a view of the oldest block, or None if empty.
+        The slot stays reserved until release() is called.
+        """
+        head = self._head
+        if head == self._tail:
+            return None
+        slot = head % len(self._slots)
+        return self._slots[slot, :self._frames[slot]]
+
+    def release(self):
+        self._head += 1
+
+    def clear(self):
+        self._head = self._tail
+
+
+# States returned by VoiceActivityDetector.feed
+VAD_SILENCE = "silence"
+VAD_SPEECH = "speech"
+VAD_END = "end"
+
+
+# Utterance endpointing from short-term energy and zero-crossing rate
+class VoiceActivityDetector:
+    """
+    Classifies each captured block as speech or silence using short-term energy
+    and zero-crossing rate against an adaptive noise floor. A hangover keeps an
+    utterance open across short gaps and a pre-roll keeps the quiet lead-in, so
+    a segment can be flushed as soon as the speaker pauses.
+    """
+
+    def __init__(self, samplerate, block_size, energy_threshold=0.005, noise_factor=3.0, zcr_threshold=0.25,
+                 hangover_ms=450, preroll_ms=300, min_speech_ms=250):
+        block_ms = 1000.0 * block_size / samplerate
+        self.energy_threshold = energy_threshold
+        self.noise_factor = noise_factor
+        self.zcr_threshold = zcr_threshold
+        self.hangover_blocks = max(1, int(round(hangover_ms / block_ms)))
+        self.min_speech_blocks = max(1, int(round(min_speech_ms / block_ms)))
+        self.preroll_samples = int(preroll_ms * samplerate / 1000.0)
+        self.noise_floor = energy_threshold / noise_factor
+        self.reset()
+
+    def reset(self):
+        self.in_utterance = False
+        self.speech_blocks = 0
+        self.silent_blocks = 0
+
+    def is_speech_block(self, samples, gain=1.0):
+        """
+        Returns True if the block looks like speech. Voiced sounds are caught by
+        energy; quiet unvoiced consonants by a high zero-crossing rate at half the energy.
+        """
+        if len(samples) < 2:
+            return False
+        rms = float(np.sqrt(np.dot(samples, samples) / len(samples))) * gain
+        signs = np.signbit(samples)
+        zcr = np.count_nonzero(signs[1:] != signs[:-1]) / (len(samples) - 1)
+        threshold = max(self.energy_threshold, self.noise_floor * self.noise_factor)
+        speech = rms >= threshold or (rms >= 0.5 * threshold and zcr >= self.zcr_threshold)
+        if not speech and not self.in_utterance:
+            # Track the background level only while nobody is talking
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+        return speech
+
+    def feed(self, samples, gain=1.0):
+        """
+        Advances the endpointer by one block and returns VAD_SILENCE, VAD_SPEECH
+        or VAD_END (the utterance just finished and should be flushed).
+        """
+        speech = self.is_speech_block(samples, gain)
+        if speech:
+            self.in_utterance = True
+            self.speech_blocks += 1
+            self.silent_blocks = 0
+            return VAD_SPEECH
+        if not self.in_utterance:
+            return VAD_SILENCE
+        self.silent_blocks += 1
+        if self.silent_blocks < self.hangover_blocks:
+            return VAD_SPEECH
+        return VAD_END
+
+    def utterance_is_valid(self):
+        """
+        True if the utterance that just ended had enough speech to be worth recognizing.
+        """
+        return self.speech_blocks >= self.min_speech_blocks
+
+
+# Rolling latency statistics for a recognition or translation backend
+class LatencyStats:
+    """
+    Keeps a call count, error count and the most recent latencies so a mean
+    and 95th percentile can be reported per backend.
+    """
+
+    def __init__(self, window=200):
+        self.calls = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, error=False):
+        with self._lock:
+            self.calls += 1
+            if error:
+                self.errors += 1
+            else:
+                self._latencies.append(seconds)
+
+    def percentile(self, fraction, min_samples=1):
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies or len(latencies) < min_samples:
+            return None
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+    def summary(self):
+        with self._lock:
+            latencies = list(self._latencies)
+            calls, errors = self.calls, self.errors
+        if not latencies:
+            return f"{calls} calls, {errors} errors"
+        mean_ms = 1000 * sum(latencies) / len(latencies)
+        p95_ms = 1000 * self.percentile(0.95)
+        return f"{calls} calls, {errors} errors, mean {mean_ms:.0f} ms, p95 {p95_ms:.0f} ms"
+
+
+# Circuit breaker that stops calling a backend after repeated failures
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures, so calls are skipped
+    for cooldown seconds. After the cooldown a single trial call is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=3, cooldown=30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened = 0  # How many times the circuit has opened
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_running or time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            reopening = self._trial_running
+            self._trial_running = False
+            if reopening or (self._opened_at is None and self.failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self.opened += 1
+                return True
+            return False
+
+
+# Token bucket limiting how often translation requests are sent
+class TokenBucket:
+    """
+    Allows bursts of up to capacity requests and rate requests per second on
+    average. acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# Releases results from a worker pool strictly in submission order
+class ReorderBuffer:
+    """
+    Each job takes a sequence number when submitted and completes it exactly
+    once. Results are passed to deliver(sequence, result) strictly in sequence
+    order. If the next result has not arrived within timeout seconds while a
+    later one is waiting, it is skipped and delivered as None. A result that
+    arrives after being skipped is dropped.
+    """
+
+    def __init__(self, deliver, timeout=10.0):
+        self.deliver = deliver
+        self.timeout = timeout
+        self.skipped = 0
+        self._pending = {}
+        self._next_to_assign = 0
+        self._next_to_deliver = 0
+        self._blocked_since = None
+        self._lock = threading.Lock()
+
+    def next_sequence(self):
+        with self._lock:
+            sequence = self._next_to_assign
+            self._next_to_assign += 1
+            return sequence
+
+    def complete(self, sequence, result):
+        with self._lock:
+            if sequence < self._next_to_deliver:
+                logging.debug(f"Dropping result {sequence}: it was skipped after timing out.")
+                return
+            self._pending[sequence] = result
+            self._release()
+
+    def expire(self):
+        """
+        Skips the result at the head of the queue if it has blocked later results for too long.
+        """
+        with self._lock:
+            if (self._blocked_since is not None and self.timeout is not None
+                    and time.monotonic() - self._blocked_since >= self.timeout):
+                logging.warning(f"Result {self._next_to_deliver} timed out; skipping it.")
+                self.skipped += 1
+                self._pending[self._next_to_deliver] = None
+                self._release()
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+            self._next_to_deliver = self._next_to_assign
+            self._blocked_since = None
+
+    def _release(self):
+        # Called with the lock held so deliveries can never interleave out of order
+        progressed = False
+        while self._next_to_deliver in self._pending:
+            result = self._pending.pop(self._next_to_deliver)
+            try:
+                self.deliver(self._next_to_deliver, result)
+            except Exception as e:
+                logging.error(f"Error delivering result {self._next_to_deliver}: {e}")
+            self._next_to_deliver += 1
+            progressed = True
+        if not self._pending:
+            self._blocked_since = None
+        elif progressed or self._blocked_since is None:
+            self._blocked_since = time.monotonic()
+
+
+# Backlog policies for RecognitionBacklog
+BACKLOG_MERGE = "Merge"
+BACKLOG_DROP_OLDEST = "Drop Oldest"
+BACKLOG_BLOCK = "Block"
+
+
+# One captured audio segment waiting for recognition
+class RecognitionJob:
+    def __init__(self, spoken_language_code, target_language_code, audio_bytes, sample_rate, overlap_samples,
+                 utterance_id=0):
+        self.spoken_language_code = spoken_language_code
+        self.target_language_code = target_language_code
+        self.audio_bytes = audio_bytes
+        self.sample_rate = sample_rate
+        self.overlap_samples = overlap_samples  # Samples shared with the previous segment
+        self.utterance_id = utterance_id  # Lets the final result replace the matching partial text
+        self.dispatched_at = time.perf_counter()
+        self.recognized_text = None
+        self.translated_text = None
+
+
+# Bounded work queue between audio capture and the recognition workers
+class RecognitionBacklog:
+    """
+    Holds at most capacity segments waiting for a recognition worker. When it
+    is full, the policy decides what happens to a new segment:
+      - BACKLOG_MERGE joins it onto the newest waiting segment (nothing is lost,
+        fewer but longer recognition calls),
+      - BACKLOG_DROP_OLDEST discards the oldest waiting segment (freshest captions),
+      - BACKLOG_BLOCK makes the capture thread wait for a free slot.
+    A sequence number is taken from sequence_source when a worker picks up a
+    segment, so merged or dropped segments never leave gaps in the ordering.
+    """
+
+    def __init__(self, capacity, policy, sequence_source, max_merged_seconds=55.0):
+        self.capacity = capacity
+        self.policy = policy
+        self.sequence_source = sequence_source
+        self.max_merged_seconds = max_merged_seconds
+        self.dropped = 0
+        self.merged = 0
+        self._jobs = deque()
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def put(self, job):
+        with self._condition:
+            if self.policy == BACKLOG_BLOCK:
+                while len(self._jobs) >= self.capacity and not self._closed:
+                    self._condition.wait()
+            elif len(self._jobs) >= self.capacity:
+                if not (self.policy == BACKLOG_MERGE and self._merge(self._jobs[-1], job)):
+                    self._jobs.popleft()
+                    self.dropped += 1
+                    # The segment after a dropped one no longer overlaps anything that will be shown
+                    (self._jobs[0] if self._jobs else job).overlap_samples = 0
+                    logging.warning(f"Recognition backlog full; dropped oldest segment ({self.dropped} so far).")
+                    self._jobs.append(job)
+                self._condition.notify_all()
+                return
+            self._jobs.append(job)
+            self._condition.notify_all()
+
+    def get(self):
+        """
+        Blocks until a segment is available and returns (sequence, job), or None once closed.
+        """
+        with self._condition:
+            while not self._jobs and not self._closed:
+                self._condition.wait()
+            if not self._jobs:
+                return None
+            job = self._jobs.popleft()
+            sequence = self.sequence_source()
+            self._condition.notify_all()
+            return sequence, job
+
+    def clear(self):
+        with self._condition:
+            self._jobs.clear()
+            self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _merge(self, pending, job):
+        if (pending.sample_rate != job.sample_rate
+                or pending.spoken_language_code != job.spoken_language_code
+                or pending.target_language_code != job.target_language_code):
+            return False
+        merged_bytes = len(pending.audio_bytes) + len(job.audio_bytes) - 2 * job.overlap_samples
+        if merged_bytes / 2 / job.sample_rate > self.max_merged_seconds:
+            return False
+        # Skip the audio the new segment shares with the pending one
+        pending.audio_bytes += job.audio_bytes[2 * job.overlap_samples:]
+        pending.utterance_id = job.utterance_id
+        self.merged += 1
+        logging.debug(f"Recognition backlog full; merged segment into the newest waiting one ({self.merged} so far).")
+        return True
+
+
+# Base class for speech recognition backends
+class RecognizerBackend:
+    """
+    A speech-to-text engine. Subclasses implement transcribe() and raise
+    sr.UnknownValueError when nothing was understood or sr.RequestError when
+    the engine is unavailable, exactly like the speech_recognition recognizers.
+    """
+    name = "Base"
+
+    def __init__(self):
+        self.stats = LatencyStats()
+
+    def transcribe(self, audio_bytes, sample_rate, language):
+        raise NotImplementedError
+
+    def summary(self):
+        return self.stats.summary()
+
+    def recognize(self, audio_bytes, sample_rate, language):
+        """
+        Runs transcribe() and records its latency. "Nothing understood" counts
+        as a successful call; engine failures count as errors.
+        """
+        start = time.perf_counter()
+        try:
+            text = self.transcribe(audio_bytes, sample_rate, language)
+        except sr.UnknownValueError:
+            self.stats.record(time.perf_counter() - start)
+            raise
+        except Exception:
+            self.stats.record(time.perf_counter() - start, error=True)
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return text
+
+
+# Google Web Speech API (online)
+class GoogleRecognizer(RecognizerBackend):
+    name = "Google (online)"
+
+    def transcribe(self, audio_bytes, sample_rate, language):
+        audio = sr.AudioData(audio_bytes, sample_rate, 2)
+        return sr.Recognizer().recognize_google(audio, language=language)
+
+
+# Local CPU-only recognition with faster-whisper (optional dependency)
+class FasterWhisperRecognizer(RecognizerBackend):
+    """
+    Offline recognition on the CPU using an int8 faster-whisper model. The model
+    is loaded once on first use and shared by all recognition workers.
+    """
+    name = "Whisper (offline CPU)"
+    model_rate = 16000
+
+    def __init__(self, model_size="base"):
+        super().__init__()
+        self.model_size = model_size
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    def get_model(self):
+        with self._model_lock:
+            if self._model is None:
+                try:
+                    from faster_whisper import WhisperModel
+                except ImportError:
+                    raise sr.RequestError("faster-whisper is not installed (pip install faster-whisper)")
+                logging.info(f"Loading faster-whisper model '{self.model_size}' on CPU.")
+                self._model = WhisperModel(self.model_size, device="cpu", compute_type="int8")
+            return self._model
+
+    def transcribe(self, audio_bytes, sample_rate, language):
+        model = self.get_model()
+        samples = np.frombuffer(audio_bytes, dtype=np.int16).astype(np.float32) / 32768.0
+        if sample_rate != self.model_rate:
+            divisor = math.gcd(int(sample_rate), self.model_rate)
+            samples = resample_poly(samples, self.model_rate // divisor, int(sample_rate) // divisor)
+        whisper_language = language.split("-")[0].lower()
+        if whisper_language == "iw":
+            whisper_language = "he"
+        try:
+            segments, _ = model.transcribe(samples.astype(np.float32), language=whisper_language, beam_size=1)
+        except ValueError:
+            # Language not known to Whisper: let it detect the language itself
+            segments, _ = model.transcribe(samples.astype(np.float32), beam_size=1)
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+# Deterministic stand-in recognizer for testing and benchmarking without a network
+class ScriptedRecognizer(RecognizerBackend):
+    """
+    Returns scripted lines in order (cycling), or a description of the segment
+    when no script is given, after an optional fixed latency.
+    """
+    name = "Scripted (test)"
+
+    def __init__(self, script=None, latency=0.0):
+        super().__init__()
+        self.script = list(script or [])
+        self.latency = latency
+        self._counter = 0
+        self._counter_lock = threading.Lock()
+
+    def transcribe(self, audio_bytes, sample_rate, language):
+        with self._counter_lock:
+            index = self._counter
+            self._counter += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.script:
+            return self.script[index % len(self.script)]
+        seconds = len(audio_bytes) / 2 / sample_rate
+        return f"segment {index + 1} lasting {seconds:.1f} seconds"
+
+
+# Google Translate client that keeps its HTTP connection open between calls
+class SessionGoogleTranslator:
+    """
+    Sends the request deep_translator's GoogleTranslator sends (its page URL,
+    input checks and errors), but through this client's own requests.Session,
+    so the connection to Google is reused. base_url points the client at
+    another server (the benchmark stand-in). An instance must only be used by
+    one thread at a time.
+    """
+    max_chars = 5000
+    element_tag = "div"
+    element_queries = ({"class": "t0"}, {"class": "result-container"})
+
+    def __init__(self, source, target, base_url=None, timeout=None):
+        self.source = source
+        self.target = target
+        self.base_url = base_url or TRANSLATOR_BASE_URLS["GOOGLE_TRANSLATE"]
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def translate(self, text):
+        is_input_valid(text, max_chars=self.max_chars)
+        text = text.strip()
+        if self.source == self.target or not text:
+            return text
+        response = self.session.get(self.base_url, params={"tl": self.target, "sl": self.source, "q": text},
+                                    timeout=self.timeout)
+        if response.status_code == 429:
+            raise translator_errors.TooManyRequests()
+        if request_failed(status_code=response.status_code):
+            raise translator_errors.RequestError()
+        soup = BeautifulSoup(response.text, "html.parser")
+        for query in self.element_queries:
+            element = soup.find(self.element_tag, query)
+            if element:
+                # Packed requests come back with one translated line per source line
+                return element.get_text(separator="\n", strip=True)
+        raise translator_errors.TranslationNotFound(text)
+
+    def close(self):
+        self.session.close()
+
+
+# Reusable translator clients, kept per language pair
+class TranslatorPool:
+    """
+    Lends translator clients for a (source, target) pair and takes them back
+    after use, so connections are reused instead of opened for every segment.
+    Each client serves one thread at a time and at most max_idle idle clients
+    are kept per pair. clear() discards them all, e.g. when the languages change;
+    clients lent out before a clear() are closed when they come back.
+    """
+
+    def __init__(self, factory, max_idle=8):
+        self.factory = factory
+        self.max_idle = max_idle
+        self.created = 0
+        self.reused = 0
+        self._idle = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def client(self, source, target):
+        pair = (source, target)
+        with self._lock:
+            generation = self._generation
+            idle = self._idle.get(pair)
+            client = idle.pop() if idle else None
+            if client is None:
+                self.created += 1
+            else:
+                self.reused += 1
+        if client is None:
+            client = self.factory(source, target)
+        try:
+            yield client
+        finally:
+            with self._lock:
+                idle = self._idle.setdefault(pair, [])
+                keep = generation == self._generation and len(idle) < self.max_idle
+                if keep:
+                    idle.append(client)
+            if not keep:
+                self.close_client(client)
+
+    def clear(self):
+        with self._lock:
+            clients = [client for idle in self._idle.values() for client in idle]
+            self._idle.clear()
+            self._generation += 1
+        for client in clients:
+            self.close_client(client)
+
+    @staticmethod
+    def close_client(client):
+        close = getattr(client, "close", None)
+        if close is not None:
+            close()
+
+
+# Request sizes (characters) that separate the latency buckets used to decide when to hedge a call
+HEDGE_SIZE_BUCKETS = (200, 1000, 2500)
+
+
+# Base class for translation backends
+class TranslationBackend:
+    """
+    A translation engine. Subclasses implement request(); translate() wraps it
+    and records latency and errors, overall and per request size bucket. Any
+    exception means the call failed, so the next backend in the failover order
+    can be tried. The circuit breaker is used by the app to skip a backend that
+    keeps failing.
+    """
+    name = "Base"
+    failover = True  # May be used when the selected backend fails
+    hedge = True  # A slow call may be raced by a duplicate request
+
+    def __init__(self):
+        self.stats = LatencyStats()
+        self.size_stats = [LatencyStats() for _ in range(len(HEDGE_SIZE_BUCKETS) + 1)]
+        self.breaker = CircuitBreaker()
+        self.hedged = 0
+
+    def available(self):
+        return True
+
+    def request(self, text, source, target):
+        raise NotImplementedError
+
+    def translate(self, text, source, target):
+        size_stats = self.size_stats[bisect.bisect_right(HEDGE_SIZE_BUCKETS, len(text))]
+        start = time.perf_counter()
+        try:
+            translated = self.request(text, source, target)
+        except Exception:
+            self.stats.record(time.perf_counter() - start, error=True)
+            size_stats.record(time.perf_counter() - start, error=True)
+            raise
+        self.stats.record(time.perf_counter() - start)
+        size_stats.record(time.perf_counter() - start)
+        return translated
+
+    def hedge_delay(self, text):
+        """
+        Seconds after which a call for text is slower than usual: the 95th
+        percentile latency of requests of about the same size, or None if
+        calls are not hedged or there are too few samples yet.
+        """
+        if not self.hedge:
+            return None
+        return self.size_stats[bisect.bisect_right(HEDGE_SIZE_BUCKETS, len(text))].percentile(0.95, min_samples=20)
+
+    def reset(self):
+        """
+        Drops per-language-pair state, e.g. when the languages change.
+        """
+
+    def summary(self):
+        return f"{self.stats.summary()}, {self.hedged} hedged, circuit opened {self.breaker.opened} times"
+
+
+# Google Translate (online) through pooled keep-alive clients
+class GoogleTranslationBackend(TranslationBackend):
+    name = "Google (online)"
+
+    def __init__(self, timeout=4.0, base_url=None):
+        super().__init__()
+        self.timeout = timeout
+        self.pool = TranslatorPool(lambda source, target: SessionGoogleTranslator(source, target, base_url=base_url,
+                                                                                   timeout=self.timeout))
+
+    def request(self, text, source, target):
+        with self.pool.client(source, target) as translator:
+            return translator.translate(text)
+
+    def reset(self):
+        self.pool.clear()
+
+
+# Local offline translation with Argos Translate (optional dependency)
+class ArgosTranslationBackend(TranslationBackend):
+    """
+    Translates on this machine with Argos Translate. The package and the
+    language pair models have to be installed separately; lines are
+    translated one by one so packed requests keep their line structure.
+    """
+    name = "Argos (offline)"
+    hedge = False  # Runs on the local CPU; a duplicate would only compete with the original
+
+    def __init__(self):
+        super().__init__()
+        self._available = None
+        self._translations = {}
+        self._lock = threading.Lock()
+
+    def available(self):
+        if self._available is None:
+            try:
+                import argostranslate.translate  # noqa: F401
+                self._available = True
+            except ImportError:
+                self._available = False
+        return self._available
+
+    @staticmethod
+    def argos_code(language):
+        code = language.split("-")[0].lower()
+        return {"iw": "he", "jw": "jv"}.get(code, code)
+
+    def get_translation(self, source, target):
+        pair = (self.argos_code(source), self.argos_code(target))
+        with self._lock:
+            if pair not in self._translations:
+                try:
+                    from argostranslate import translate as argos_translate
+                except ImportError:
+                    raise RuntimeError("argostranslate is not installed (pip install argostranslate)")
+                installed = {language.code: language for language in argos_translate.get_installed_languages()}
+                translation = None
+                if pair[0] in installed and pair[1] in installed:
+                    translation = installed[pair[0]].get_translation(installed[pair[1]])
+                self._translations[pair] = translation
+            translation = self._translations[pair]
+        if translation is None:
+            raise RuntimeError(f"No Argos language package installed for {pair[0]} -> {pair[1]}")
+        return translation
+
+    def request(self, text, source, target):
+        translation = self.get_translation(source, target)
+        return "\n".join(translation.translate(line) if line.strip() else line for line in text.split("\n"))
+
+    def reset(self):
+        with self._lock:
+            self._translations.clear()
+
+
+# Deterministic stand-in translator for testing and benchmarking without a network
+class ScriptedTranslationBackend(TranslationBackend):
+    """
+    Tags each line with the target language instead of translating it, after an
+    optional fixed latency. With fail_every=n every n-th call raises, to
+    exercise failover.
+    """
+    name = "Scripted (test)"
+    failover = False
+
+    def __init__(self, latency=0.0, fail_every=0):
+        super().__init__()
+        self.latency = latency
+        self.fail_every = fail_every
+        self._counter = 0
+        self._counter_lock = threading.Lock()
+
+    def request(self, text, source, target):
+        with self._counter_lock:
+            self._counter += 1
+            fail = self.fail_every and self._counter % self.fail_every == 0
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise RuntimeError("Scripted translation failure")
+        return "\n".join(f"[{target}] {line}" for line in text.split("\n"))
+
+
+# Two-tier translation cache: an in-memory LRU in front of a SQLite file
+class TranslationCache:
+    """
+    Caches translations keyed by (backend, source, target, normalised text),
+    so a translation is only served for the translator that produced it.
+    Recent entries are kept in memory; every entry is also written to SQLite
+    so it survives restarts. On disk, entries unused for max_age_days are removed and
+    only the max_entries most recently used are kept. With path=None, or if the
+    file cannot be opened, only the memory tier is used.
+    """
+
+    def __init__(self, path, memory_size=1000, max_entries=200000, max_age_days=180, evict_every=500):
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.evict_every = evict_every
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._db = None
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.execute("CREATE TABLE IF NOT EXISTS translations (backend TEXT NOT NULL, "
+                                 "source TEXT NOT NULL, target TEXT NOT NULL, text TEXT NOT NULL, "
+                                 "translation TEXT NOT NULL, used REAL NOT NULL, "
+                                 "PRIMARY KEY (backend, source, target, text))")
+                self._db.execute("CREATE INDEX IF NOT EXISTS translations_used ON translations (used)")
+                self._evict()
+            except sqlite3.Error as e:
+                logging.error(f"Translation cache file unavailable, using memory only: {e}")
+                self._db = None
+
+    @staticmethod
+    def normalise(text):
+        return unicodedata.normalize("NFC", " ".join(text.split())).casefold()
+
+    def get(self, backend, source, target, text):
+        key = (backend, source, target, self.normalise(text))
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+            if self._db is not None:
+                try:
+                    row = self._db.execute("SELECT translation FROM translations WHERE backend=? AND "
+                                           "source=? AND target=? AND text=?", key).fetchone()
+                    if row is not None:
+                        self._db.execute("UPDATE translations SET used=? WHERE backend=? AND source=? AND "
+                                         "target=? AND text=?", (time.time(),) + key)
+                        self.disk_hits += 1
+                        self._remember(key, row[0])
+                        return row[0]
+                except sqlite3.Error as e:
+                    logging.error(f"Translation cache read failed: {e}")
+            self.misses += 1
+            return None
+
+    def contains(self, backend, source, target, text):
+        """
+        True if a translation is cached; unlike get() this is not counted as a hit or miss.
+        """
+        key = (backend, source, target, self.normalise(text))
+        with self._lock:
+            if key in self._memory:
+                return True
+            if self._db is None:
+                return False
+            try:
+                return self._db.execute("SELECT 1 FROM translations WHERE backend=? AND source=? AND "
+                                        "target=? AND text=?", key).fetchone() is not None
+            except sqlite3.Error as e:
+                logging.error(f"Translation cache read failed: {e}")
+                return False
+
+    def put(self, backend, source, target, text, translation):
+        key = (backend, source, target, self.normalise(text))
+        with self._lock:
+            self._remember(key, translation)
+            if self._db is None:
+                return
+            try:
+                self._db.execute("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)",
+                                 key + (translation, time.time()))
+                self._writes_since_evict += 1
+                if self._writes_since_evict >= self.evict_every:
+                    self._evict()
+            except sqlite3.Error as e:
+                logging.error(f"Translation cache write failed: {e}")
+
+    def summary(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hit_rate = 100.0 * (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+            return (f"{lookups} lookups, {self.memory_hits} memory hits, {self.disk_hits} disk hits, "
+                    f"{self.misses} misses ({hit_rate:.0f}% hit rate)")
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key, translation):
+        # Called with the lock held
+        self._memory[key] = translation
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        # Called with the lock held (or from __init__): drop stale entries, then the least recently used
+        self._writes_since_evict = 0
+        self._db.execute("DELETE FROM translations WHERE used < ?",
+                         (time.time() - self.max_age_days * 86400,))
+        self._db.execute("DELETE FROM translations WHERE rowid IN (SELECT rowid FROM translations "
+                         "ORDER BY used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+
+# Fuzzy translation memory for sentences recognized almost the same as before
+class TranslationMemory:
+    """
+    Returns a stored translation for a sentence that is nearly the same as one
+    translated before: changed punctuation, one different word or overlap
+    artefacts. Sentences are compared as sets of character 3-grams of their
+    words. A MinHash signature split into bands finds candidate sentences, and
+    the most similar candidate is used if its Jaccard similarity is at least
+    threshold. The most recent max_entries sentences are kept.
+    """
+
+    def __init__(self, threshold=0.8, min_chars=12, bands=16, rows=4, max_entries=5000, seed=1):
+        self.threshold = threshold
+        self.min_chars = min_chars
+        self.bands = bands
+        self.rows = rows
+        self.max_entries = max_entries
+        self.lookups = 0
+        self.hits = 0
+        generator = np.random.default_rng(seed)
+        self._multipliers = generator.integers(1, 2 ** 32, size=bands * rows, dtype=np.uint64) | np.uint64(1)
+        self._offsets = generator.integers(0, 2 ** 32, size=bands * rows, dtype=np.uint64)
+        self._entries = OrderedDict()  # id -> (language pair, shingles, band keys, translation)
+        self._buckets = {}  # (language pair, band, band hash) -> ids
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    # Character 3-grams of the casefolded words, ignoring punctuation and spacing
+    def shingles(self, text):
+        words = "".join(c if c.isalnum() or unicodedata.category(c).startswith("M") else " "
+                        for c in unicodedata.normalize("NFC", text).casefold()).split()
+        normalised = " " + " ".join(words) + " "
+        if len(normalised) - 2 < self.min_chars:
+            return None
+        return frozenset(normalised[i:i + 3] for i in range(len(normalised) - 2))
+
+    def _band_keys(self, pair, shingles):
+        hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64,
+                             count=len(shingles))
+        # Multiply-add hashing wraps around at 64 bits, which is fine for a min-hash
+        signature = (hashes[:, None] * self._multipliers + self._offsets).min(axis=0)
+        return [(pair, band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                for band in range(self.bands)]
+
+    def add(self, source, target, text, translation, backend=None):
+        shingles = self.shingles(text)
+        if shingles is None:
+            return
+        pair = (backend, source, target)
+        band_keys = self._band_keys(pair, shingles)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (pair, shingles, band_keys, translation)
+            for key in band_keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+            if len(self._entries) > self.max_entries:
+                old_id, (_, _, old_keys, _) = self._entries.popitem(last=False)
+                for key in old_keys:
+                    bucket = self._buckets[key]
+                    bucket.discard(old_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def get(self, source, target, text, backend=None):
+        shingles = self.shingles(text)
+        if shingles is None:
+            return None
+        band_keys = self._band_keys((backend, source, target), shingles)
+        best, best_similarity = None, self.threshold
+        with self._lock:
+            self.lookups += 1
+            candidates = set()
+            for key in band_keys:
+                candidates.update(self._buckets.get(key, ()))
+            for entry_id in candidates:
+                _, entry_shingles, _, translation = self._entries[entry_id]
+                similarity = len(shingles & entry_shingles) / len(shingles | entry_shingles)
+                if similarity >= best_similarity:
+                    best, best_similarity = translation, similarity
+            if best is not None:
+                self.hits += 1
+        return best
+
+    def summary(self):
+        with self._lock:
+            return (f"{len(self._entries)} sentences, {self.hits} of {self.lookups} lookups answered by a "
+                    f"similar sentence (threshold {self.threshold:.2f})")
+
+
+# Offline language identification from the script and character n-grams
+class LanguageIdentifier:
+    """
+    Identifies the language of a sentence without going online. A script used
+    by one language decides on its own (e.g. Greek, Thai, Korean). For shared
+    scripts a naive Bayes model over the 1- to 3-grams of each language's
+    frequent words (LANGUAGE_ID_WORDS) picks the language, if the winning
+    margin is at least min_margin per n-gram, and at least switch_margin over
+    the preferred (selected) language. Only the given language codes are
+    returned. Decisions are cached; a sentence that cannot be decided gets the
+    language of most of the recent decisions in the session, or None.
+    """
+
+    def __init__(self, languages, min_margin=0.1, switch_margin=0.7, min_ngrams=8, smoothing=0.01,
+                 foreign_letter_penalty=30.0, cache_size=2000):
+        self.languages = set(languages)
+        self.smoothing = smoothing
+        self.foreign_letter_penalty = foreign_letter_penalty
+        self.min_margin = min_margin
+        self.switch_margin = switch_margin
+        self.min_ngrams = min_ngrams
+        self.cache_size = cache_size
+        self.session_language = None
+        self._recent = deque(maxlen=5)
+        self.lookups = 0
+        self.cache_hits = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._models = {}
+        for script, words_by_language in LANGUAGE_ID_WORDS.items():
+            codes = [code for code in words_by_language if code in self.languages]
+            if not codes:
+                continue
+            counts = [self.ngram_counts(words_by_language[code].split()) for code in codes]
+            vocabulary = set().union(*counts)
+            totals = np.array([sum(count.values()) for count in counts], dtype=np.float64)
+            # Smoothed log probabilities, one row per n-gram and one column per language
+            vocabulary = sorted(vocabulary)
+            table = np.log(np.array([[count.get(ngram, 0) + self.smoothing for count in counts]
+                                     for ngram in vocabulary], dtype=np.float64))
+            table -= np.log(totals + self.smoothing * len(vocabulary))
+            # For each letter of the script's alphabets, which languages do not use it
+            letters = LANGUAGE_ID_LETTERS.get(script)
+            foreign = {}
+            if letters:
+                base = string.ascii_lowercase if script == "Latin" else ""
+                alphabets = [set(base + letters[code]) for code in codes]
+                foreign = {letter: np.array([letter not in alphabet for alphabet in alphabets], dtype=np.float64)
+                           for letter in set().union(*alphabets)}
+            self._models[script] = (codes, {ngram: row for row, ngram in enumerate(vocabulary)}, table, foreign)
+
+    @staticmethod
+    def ngram_counts(words):
+        counts = {}
+        for word in words:
+            padded = f" {word} "
+            for n in (1, 2, 3):
+                for i in range(len(padded) - n + 1):
+                    ngram = padded[i:i + n]
+                    if ngram != " ":
+                        counts[ngram] = counts.get(ngram, 0) + 1
+        return counts
+
+    @staticmethod
+    def script_of(character):
+        if character.isascii() or 0xC0 <= ord(character) <= 0x24F or 0x1E00 <= ord(character) <= 0x1EFF:
+            return "Latin"
+        index = bisect.bisect_right(LANGUAGE_ID_SCRIPT_STARTS, ord(character)) - 1
+        if index >= 0 and ord(character) <= LANGUAGE_ID_SCRIPT_RANGES[index][1]:
+            return LANGUAGE_ID_SCRIPT_RANGES[index][2]
+        return None
+
+    def identify(self, text, preferred=None):
+        key = (preferred, " ".join(text.split()).casefold())
+        with self._lock:
+            self.lookups += 1
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return self._cache[key] or self.session_language
+        language = self._decide(key[1], preferred)
+        with self._lock:
+            self._cache[key] = language
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            if language:
+                self._recent.append(language)
+                common, votes = Counter(self._recent).most_common(1)[0]
+                self.session_language = common if votes >= 3 else None
+            return language or self.session_language
+
+    def reset(self):
+        with self._lock:
+            self.session_language = None
+            self._recent.clear()
+            self._cache.clear()
+
+    def _decide(self, text, preferred=None):
+        scripts = {}
+        for character in text:
+            if character.isalpha():
+                script = self.script_of(character)
+                if script:
+                    scripts[script] = scripts.get(script, 0) + 1
+        if not scripts:
+            return None
+        script = max(scripts, key=scripts.get)
+        if "Kana" in scripts and script in ("Han", "Kana"):
+            language = "ja"
+        elif script == "Han":
+            simplified = sum(1 for character in text if character in SIMPLIFIED_CHINESE_CHARS)
+            traditional = sum(1 for character in text if character in TRADITIONAL_CHINESE_CHARS)
+            if simplified == traditional:
+                return None
+            language = "zh-CN" if simplified > traditional else "zh-TW"
+        elif script in SINGLE_LANGUAGE_SCRIPTS:
+            language = SINGLE_LANGUAGE_SCRIPTS[script]
+        elif script in self._models:
+            codes, rows, table, foreign = self._models[script]
+            if len(codes) == 1:
+                return codes[0]
+            words = "".join(character if character.isalpha() or unicodedata.category(character).startswith("M")
+                            else " " for character in text).split()
+            # N-grams that no language's words contain carry no evidence and are left out
+            counts = [(rows[ngram], count) for ngram, count in self.ngram_counts(words).items() if ngram in rows]
+            total = sum(count for _, count in counts)
+            if total < self.min_ngrams:
+                return None
+            indices, weights = zip(*counts)
+            scores = np.asarray(weights, dtype=np.float64) @ table[list(indices)]
+            for letter in set(text):
+                if letter in foreign:
+                    scores -= self.foreign_letter_penalty * text.count(letter) * foreign[letter]
+            order = np.argsort(scores)
+            if (scores[order[-1]] - scores[order[-2]]) / total < self.min_margin:
+                return None
+            language = codes[order[-1]]
+            if preferred in codes and language != preferred and (
+                    scores[order[-1]] - scores[codes.index(preferred)]) / total < self.switch_margin:
+                return preferred
+        else:
+            return None
+        return language if language in self.languages else None
+
+    def summary(self):
+        with self._lock:
+            return f"{self.lookups} lookups, {self.cache_hits} answered from the session cache"
+
+
+# Translates text reading segments ahead of the reading position on a background thread
+class TranslationPrefetcher:
+    """
+    Keeps translations of segments [cursor, cursor + window) of the current
+    segment list ready. translate(segments, index) runs on the prefetch
+    thread, lowest index first. reset() starts over with new segments or a new
+    position; translations still running for the old position are discarded.
+    """
+
+    def __init__(self, translate, window=5):
+        self.translate = translate
+        self.window = window
+        self.segments = None
+        self.ready = 0  # Segments whose translation was ready when reading reached them
+        self.waited = 0  # Segments reading had to wait for
+        self._cursor = 0
+        self._generation = 0
+        self._results = {}
+        self._running = None
+        self._missed = None
+        self._closed = False
+        self._condition = threading.Condition()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def reset(self, segments, cursor):
+        with self._condition:
+            self.segments = segments
+            self._cursor = cursor
+            self._generation += 1
+            self._results.clear()
+            self._missed = None
+            self._condition.notify()
+
+    def take(self, index):
+        """
+        Returns the translation of segment index, or None if it is not ready
+        yet. Either way the window moves to start at index.
+        """
+        with self._condition:
+            if index != self._cursor:
+                self._results = {i: result for i, result in self._results.items() if i >= index}
+                self._cursor = index
+            result = self._results.pop(index, None)
+            if result is not None:
+                self._cursor = index + 1
+                if self._missed != index:
+                    self.ready += 1
+            elif self._missed != index:
+                self._missed = index
+                self.waited += 1
+            self._condition.notify()
+            return result
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    # Next segment in the window that is neither translated nor being translated
+    def _next_index(self):
+        if self.segments is None:
+            return None
+        for index in range(self._cursor, min(self._cursor + self.window, len(self.segments))):
+            if index not in self._results and index != self._running:
+                return index
+        return None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and self._next_index() is None:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                index = self._next_index()
+                segments, generation = self.segments, self._generation
+                self._running = index
+            try:
+                result = self.translate(segments, index)
+            except Exception as e:
+                # Segments replaced by reset() meanwhile may have been closed, so are not read again
+                result = None
+                if generation == self._generation:
+                    logging.error(f"Prefetching translation of segment {index + 1} failed: {e}")
+                    result = segments[index]
+            with self._condition:
+                self._running = None
+                if result is not None and generation == self._generation and index >= self._cursor:
+                    self._results[index] = result
+
+
+# Code points that str.split() treats as whitespace (all are below U+3001)
+WHITESPACE_CODES = np.array([code for code in range(0x3001) if chr(code).isspace()], dtype=np.uint32)
+
+
+class SegmentIndex:
+    """
+    Where each reading segment lies in the text it was split from, as
+    character offsets and Tk "line.column" positions, built once when the
+    text is submitted. Segments cover the text in order and differ from it
+    only in whitespace, so the index counts non-whitespace characters.
+    range() is a list lookup and segment_at() a binary search.
+    """
+
+    def __init__(self, text, segments):
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        # Number of non-whitespace characters up to and including each character of the text
+        visible = np.cumsum(~np.isin(codes, WHITESPACE_CODES))
+        lengths = np.fromiter((len("".join(segment.split())) for segment in segments), dtype=np.int64,
+                              count=len(segments))
+        counts = np.cumsum(lengths)
+        last = max(len(codes) - 1, 0)
+        starts = np.minimum(np.searchsorted(visible, counts - lengths + 1), last)
+        ends = np.minimum(np.searchsorted(visible, counts) + 1, len(codes))
+        newlines = np.flatnonzero(codes == 10)
+        self.line_starts = [0] + (newlines + 1).tolist()
+        self.starts = starts.tolist()
+
+        # Tk positions: the line is one more than the newlines before the offset
+        def positions(offsets):
+            lines = np.searchsorted(newlines, offsets)
+            columns = offsets - np.concatenate(([0], newlines + 1))[lines]
+            return [f"{line}.{column}" for line, column in zip((lines + 1).tolist(), columns.tolist())]
+
+        self.ranges = list(zip(positions(starts), positions(ends)))
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def range(self, index):
+        """
+        Returns the Tk start and end positions of segment index.
+        """
+        return self.ranges[index]
+
+    def segment_at(self, position):
+        """
+        Returns the index of the segment at a Tk "line.column" position.
+        """
+        line, column = (int(part) for part in position.split("."))
+        offset = self.line_starts[min(line, len(self.line_starts)) - 1] + column
+        return max(0, bisect.bisect_right(self.starts, offset) - 1)
+
+
 # Main TranslatorApp class encapsulating the entire application
 class TranslatorApp:
     def __init__(self, root):
         """
         Initialize the TranslatorApp:
           - Sets up GUI components.
-          - Initializes audio capture, speech recognition, TTS, and translation caching.
-          - Configures various control variables.
-        """
-        self.root = root
-        self.is_listening = False
-        self.samplerate = 16000
-        self.chunk_size = 2048
-        self.buffered_chunks = []
-        self.gain = 1.0
-        self.languages_swapped = False
-        self.message_queue = queue.Queue()
-        self.translation_queue = queue.Queue()
+          - Initializes audio capture, speech recognition, TTS, and translation caching.
+          - Configures various control variables.
+        """
+        self.root = root
+        self.init_pipeline()
         self.task_queue = queue.Queue()
 
         self.MAX_RECOGNIZED_LINES = 100
@@ -194,17 +2134,16 @@ class TranslatorApp:
         self.voice_var = tk.StringVar(value="Loading voices...")
         self.font_size_var = tk.IntVar(value=20)
         self.tts_output_device_var = tk.StringVar(value="Default")
-        self.mic_level_queue = queue.Queue()
-
-        # Set up translation cache (LRU-style)
-        self.translation_cache = OrderedDict()
-        self.cache_lock = threading.Lock()
-        self.cache_size = 1000
 
         # Variables to control text reading from input
         self.text_segments = []
         self.text_segment_index = 0
         self.text_reading_active = True
+        self.file_loader = None  # Segment generator of the file still being loaded into the listbox
+        # The listbox holds only listbox_window segments around the reading position, starting at listbox_offset
+        self.listbox_window = 200
+        self.listbox_offset = 0
+        self.segment_index = None  # Positions of the segments in the input textbox
         self.last_spoken_text = ""
         self.input_listbox = None
         self.input_text_box = None
@@ -228,8 +2167,9 @@ class TranslatorApp:
         # TTS speech rate control (100% is normal speed)
         self.tts_rate_var = tk.DoubleVar(value=100)
 
-        # Overlap percentage for audio segments
-        self.overlap_percentage = tk.DoubleVar(value=4)
+        # Batch translation: parallel requests and the request rate limit (per second)
+        self.batch_concurrency_var = tk.IntVar(value=4)
+        self.batch_rate_var = tk.IntVar(value=20)
 
         # Calculate scaling factor based on screen dimensions
         screen_width = self.root.winfo_screenwidth()
@@ -251,15 +2191,6 @@ class TranslatorApp:
         combobox_width = int(60 * self.scale_factor)
         self.root.minsize(combobox_width + 150, int(600 * self.scale_factor))
 
-        # Load language dictionary for translations
-        self.languages = self.get_language_dict()
-        self.language_code_to_name = {code: name for name, code in self.languages.items()}
-        self.current_spoken_language = self.languages.get("English (US)", "en")
-        self.current_target_language = self.languages.get("English (US)", "en")
-
-        self.buffer_size_var = tk.IntVar(value=100)
-        self.buffer_size = self.buffer_size_var.get()
-
         # Configure FFmpeg for audio conversion
         self.configure_ffmpeg()
         # Build GUI widgets
@@ -271,25 +2202,139 @@ class TranslatorApp:
         self.root.after(100, self.update_textbox)
         self.root.after(100, self.update_translation_box)
         self.root.after(100, self.process_mic_level_queue)
-
-        self.audio_thread = None
-        self.audio_stop_event = threading.Event()
+        self.root.after(100, self.update_partial_text)
 
         # Set up and start the asyncio loop for TTS in a separate thread
         self.tts_loop = asyncio.new_event_loop()
         self.tts_thread = threading.Thread(target=self.start_tts_loop, daemon=True)
         self.tts_thread.start()
 
-        # Set up a thread pool for audio processing tasks
-        self.executor = ThreadPoolExecutor(max_workers=2)
+        # Periodically release recognition results held back by a stalled one
+        self.root.after(250, self.check_recognition_order)
         # Load available TTS voices asynchronously
         self.list_edge_tts_voices()
 
         # Set up observers to update languages when UI selections change
         self.spoken_language_var.trace_add('write', self.update_spoken_language)
         self.target_language_var.trace_add('write', self.update_target_language)
+        self.recognizer_backend_var.trace_add('write', self.update_recognizer_backend)
+        self.translation_backend_var.trace_add('write', self.update_translation_backend)
+        self.backlog_policy_var.trace_add('write', self.update_backlog_policy)
         self.root.bind("<Configure>", self.on_resize)
 
+    # Set up the capture, recognition and translation pipeline state (everything that does not need widgets)
+    def init_pipeline(self, cache_path=translation_cache_file):
+        self.is_listening = False
+        self.samplerate = 16000
+        # Rate audio is resampled to before upload; 0 keeps the device rate
+        self.recognition_rate_var = tk.StringVar(self.root, value="16000")
+        self.recognition_samplerate = 16000
+        # Selectable speech recognition engines
+        self.recognizer_backends = OrderedDict(
+            (backend.name, backend) for backend in (GoogleRecognizer(), FasterWhisperRecognizer(), ScriptedRecognizer()))
+        self.recognizer_backend = self.recognizer_backends[GoogleRecognizer.name]
+        self.recognizer_backend_var = tk.StringVar(self.root, value=GoogleRecognizer.name)
+        # What to do with new audio when recognition falls behind, and the live backlog depth
+        self.backlog_policy_var = tk.StringVar(self.root, value=BACKLOG_DROP_OLDEST)
+        self.backlog_depth_var = tk.StringVar(self.root, value="Backlog: 0")
+        # Streaming partial results: a sliding window is recognized every partial_interval seconds
+        self.partial_results_enabled = tk.BooleanVar(self.root, value=False)
+        self.partial_results_enabled.trace_add("write", self.update_capture_settings)
+        self.partial_interval = 0.6
+        self.partial_window = 5.0
+        self.partial_in_flight = False
+        self.samples_since_partial = 0
+        self.utterance_id = 1
+        self.partial_queue = queue.Queue()
+        self.partial_display_id = None
+        self.finalized_utterance_id = 0
+        self.chunk_size = 2048
+        self.max_buffer_chunks = 140
+        # Preallocated capture buffer sized for the largest buffer size setting
+        self.audio_ring = AudioRingBuffer(self.max_buffer_chunks * self.chunk_size, max_block=self.chunk_size)
+        # Held by the capture thread while it processes a block, and by anything else that changes the ring
+        self.capture_lock = threading.Lock()
+        # Lock-free hand-off from the PortAudio callback to the capture thread (about 5 s of audio at 16 kHz)
+        self.capture_queue = AudioBlockQueue(slots=64, block_size=self.chunk_size)
+        self.input_overflows = 0
+        self.gain = 1.0
+        # Voice activity endpointing: flush a segment when the speaker pauses
+        self.vad_enabled = tk.BooleanVar(self.root, value=True)
+        self.vad_enabled.trace_add("write", self.update_capture_settings)
+        self.vad = None
+        self.languages_swapped = False
+        self.message_queue = queue.Queue()
+        self.translation_queue = queue.Queue()
+        self.mic_level_queue = queue.Queue()
+
+        # Set up the translation cache (in-memory LRU backed by a SQLite file)
+        self.translation_cache = TranslationCache(cache_path)
+        # Longest wait for one translation call. Google's HTTP timeout is the same, so a call given up at the
+        # deadline does not hold a call executor worker much longer
+        self.translation_deadline = 4.0
+        # Selectable translation engines; the others are tried in order if the selected one fails. The scripted
+        # stand-in is only used by --replay and the benchmarks
+        self.translation_backends = OrderedDict(
+            (backend.name, backend) for backend in (GoogleTranslationBackend(timeout=self.translation_deadline),
+                                                    ArgosTranslationBackend()))
+        self.translation_backend = self.translation_backends[GoogleTranslationBackend.name]
+        self.translation_backend_var = tk.StringVar(self.root, value=GoogleTranslationBackend.name)
+
+        # Overlap percentage for audio segments
+        self.overlap_percentage = tk.DoubleVar(self.root, value=4)
+        self.overlap_percentage.trace_add("write", self.update_capture_settings)
+        # Plain copies of the capture settings above, which the capture thread reads instead of the Tk variables
+        self.update_capture_settings()
+
+        # Load language dictionary for translations
+        self.languages = self.get_language_dict()
+        self.language_code_to_name = {code: name for name, code in self.languages.items()}
+        # Offline identification of the language text is actually in, used as the translation source language
+        self.language_identifier = LanguageIdentifier(
+            {self.map_language_for_translation(code) for code in self.languages.values()})
+        self.detect_text_language = True
+        self.current_spoken_language = self.languages.get("English (US)", "en")
+        self.current_target_language = self.languages.get("English (US)", "en")
+
+        self.buffer_size_var = tk.IntVar(self.root, value=100)
+        self.buffer_size = self.buffer_size_var.get()
+
+        self.audio_thread = None
+        self.audio_stop_event = threading.Event()
+
+        # Set up a thread pool for audio processing tasks; results are put back in order before display
+        self.recognition_workers = 4
+        self.executor = ThreadPoolExecutor(max_workers=self.recognition_workers)
+        self.recognition_reorder = ReorderBuffer(self.deliver_recognition_result, timeout=10.0)
+        # Bounded backlog between capture and recognition
+        self.recognition_backlog = RecognitionBacklog(capacity=self.recognition_workers,
+                                                      policy=self.backlog_policy_var.get(),
+                                                      sequence_source=self.recognition_reorder.next_sequence)
+        for _ in range(self.recognition_workers):
+            self.executor.submit(self.recognition_worker_loop)
+        self.partial_executor = ThreadPoolExecutor(max_workers=1)
+        self.last_dispatch_retained = 0
+
+        # Translation calls run here so they can be given a deadline and hedged
+        self.translation_call_executor = ThreadPoolExecutor(max_workers=16)
+        # Duplicate requests in flight at once, so hedging cannot take over the call executor
+        self.hedge_slots = threading.BoundedSemaphore(4)
+        self.last_translation_error = None
+
+        # Text reading translates a few segments ahead so the GUI never waits for the network
+        self.text_prefetcher = TranslationPrefetcher(self.prefetch_segment_translation, window=5)
+        self.prefetch_wait_id = None
+
+        # Recognized sentences almost the same as one translated before reuse its translation
+        self.translation_memory = TranslationMemory(threshold=0.8)
+
+        # Characters served from the sentence cache instead of being sent for translation
+        self.memo_lock = threading.Lock()
+        self.memo_chars_total = 0
+        self.memo_chars_avoided = 0
+        self.memo_started = time.monotonic()
+        self.translation_requests = 0
+
         self.last_reported_language = None
         self.last_recognized_tail = ""
 
@@ -405,6 +2450,13 @@ class TranslatorApp:
         self.swap_button = tk.Button(lang_frame, text="Swap Languages", command=self.swap_languages, bg="silver",
                                      fg="black", font=self.main_button_font, relief="raised", bd=4)
         self.swap_button.pack(anchor="w", pady=(0, 5))
+        # Checkbox to translate from the language the text is detected to be in
+        self.detect_language_var = tk.BooleanVar(value=True)
+        self.detect_language_var.trace_add("write", self.update_language_detection)
+        detect_language_check = tk.Checkbutton(lang_frame, text="Detect Text Language",
+                                               variable=self.detect_language_var, bg="#e0e0e0", fg="black",
+                                               font=self.label_font)
+        detect_language_check.pack(anchor="w", pady=(0, 5))
         # Frame for microphone device selection
         device_frame = tk.Frame(top_frame, bg="#e0e0e0")
         device_frame.pack(side=tk.TOP, anchor="w", fill="x", padx=(60, 0), pady=(int(7.5 * self.scale_factor), 0))
@@ -413,11 +2465,36 @@ class TranslatorApp:
         device_label.pack(anchor="w")
         self.device_combobox = ttk.Combobox(device_frame, state="readonly", font=self.dropdown_font, width=60)
         self.device_combobox.pack(anchor="w", pady=(0, int(3.75 * self.scale_factor)))
+        recognizer_label = tk.Label(device_frame, text="Select Speech Recognizer:", bg="#e0e0e0", fg="black",
+                                    font=self.label_font)
+        recognizer_label.pack(anchor="w")
+        recognizer_combobox = ttk.Combobox(device_frame, textvariable=self.recognizer_backend_var,
+                                           values=list(self.recognizer_backends.keys()), state="readonly",
+                                           font=self.dropdown_font, width=30)
+        recognizer_combobox.pack(anchor="w", pady=(0, int(3.75 * self.scale_factor)))
+        translator_label = tk.Label(device_frame, text="Select Translator:", bg="#e0e0e0", fg="black",
+                                    font=self.label_font)
+        translator_label.pack(anchor="w")
+        translator_combobox = ttk.Combobox(device_frame, textvariable=self.translation_backend_var,
+                                           values=list(self.translation_backends.keys()), state="readonly",
+                                           font=self.dropdown_font, width=30)
+        translator_combobox.pack(anchor="w", pady=(0, int(3.75 * self.scale_factor)))
         # Progress bar to show microphone level
         self.mic_level = tk.DoubleVar()
         mic_progress = ttk.Progressbar(bottom_frame, orient="horizontal", mode="determinate",
                                        length=int(375 * self.scale_factor), variable=self.mic_level, maximum=100)
         mic_progress.pack(pady=int(7.5 * self.scale_factor))
+        backlog_frame = tk.Frame(bottom_frame, bg="#e0e0e0")
+        backlog_frame.pack()
+        backlog_label = tk.Label(backlog_frame, textvariable=self.backlog_depth_var, bg="#e0e0e0", fg="black",
+                                 font=self.label_font)
+        backlog_label.pack(side=tk.LEFT, padx=(0, 10))
+        policy_label = tk.Label(backlog_frame, text="When Behind:", bg="#e0e0e0", fg="black", font=self.label_font)
+        policy_label.pack(side=tk.LEFT, padx=(0, 5))
+        policy_combobox = ttk.Combobox(backlog_frame, textvariable=self.backlog_policy_var,
+                                       values=[BACKLOG_DROP_OLDEST, BACKLOG_MERGE, BACKLOG_BLOCK], state="readonly",
+                                       font=self.dropdown_font, width=12)
+        policy_combobox.pack(side=tk.LEFT)
         # Frame for various control buttons (start, flush, load file, enter text)
         button_frame = tk.Frame(bottom_frame, bg="#e0e0e0")
         button_frame.pack(pady=int(7.5 * self.scale_factor))
@@ -457,6 +2534,20 @@ class TranslatorApp:
         self.overlap_slider = tk.Scale(overlap_frame, from_=0, to=20, resolution=1, orient="horizontal",
                                        variable=self.overlap_percentage, font=self.dropdown_font)
         self.overlap_slider.pack(side=tk.LEFT)
+        vad_check = tk.Checkbutton(overlap_frame, text="Flush on Pauses", variable=self.vad_enabled,
+                                   bg="#e0e0e0", fg="black", font=self.label_font)
+        vad_check.pack(side=tk.LEFT, padx=(10, 0))
+        partial_check = tk.Checkbutton(overlap_frame, text="Show Partial Results",
+                                       variable=self.partial_results_enabled, bg="#e0e0e0", fg="black",
+                                       font=self.label_font)
+        partial_check.pack(side=tk.LEFT, padx=(10, 0))
+        rate_label = tk.Label(overlap_frame, text="Recognition Rate (Hz):", bg="#e0e0e0", fg="black",
+                              font=self.label_font)
+        rate_label.pack(side=tk.LEFT, padx=(10, 5))
+        self.recognition_rate_combobox = ttk.Combobox(overlap_frame, textvariable=self.recognition_rate_var,
+                                                      values=["8000", "16000", "22050", "32000", "Device"],
+                                                      state="readonly", font=self.dropdown_font, width=7)
+        self.recognition_rate_combobox.pack(side=tk.LEFT)
         # Text box to display recognized audio text
         self.output_window_text_box = tk.Text(self.root, height=int(15 * self.scale_factor),
                                               width=int(60 * self.scale_factor), bg="#ffffff", font=self.text_font,
@@ -483,6 +2574,7 @@ class TranslatorApp:
     def open_listbox_input_window(self):
         self.input_listbox = None
         self.input_text_box = None
+        self.listbox_offset = 0
         text_window = tk.Toplevel(self.root)
         text_window.title("Read File (Listbox)")
         text_window.geometry(f"{int(600 * self.scale_factor)}x{int(400 * self.scale_factor)}")
@@ -541,6 +2633,7 @@ class TranslatorApp:
     def open_textbox_input_window(self):
         self.input_text_box = None
         self.input_listbox = None
+        self.segment_index = None
         text_window = tk.Toplevel(self.root)
         text_window.title("Enter Text")
         text_window.geometry(f"{int(600 * self.scale_factor)}x{int(400 * self.scale_factor)}")
@@ -597,6 +2690,8 @@ class TranslatorApp:
         self.input_text_box.bind("<ButtonRelease-1>", self.on_text_click)
 
     # NEW: read_into_listbox method (restored from your original design)
+    # Load a text or EPUB file into the listbox. Segments are added in small batches between GUI events, so
+    # the first page can be read while the rest of the file is still loading
     def read_into_listbox(self):
         file_path = filedialog.askopenfilename(
             title="Select a file",
@@ -606,20 +2701,62 @@ class TranslatorApp:
             return
         try:
             if file_path.lower().endswith(".epub"):
-                full_text = epub_to_text(file_path)
+                segments = []
+                loader = append_segments(segments, iter_epub_segments(file_path))
             else:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    full_text = f.read()
-            raw_segments = split_text_with_fallback(full_text, fallback_word_count=300)
-            self.text_segments = merge_short_segments(raw_segments, min_word_count=3, min_char_threshold=4)
-            self.input_listbox.delete(0, tk.END)
-            for seg in self.text_segments:
-                self.input_listbox.insert(tk.END, seg)
-            if self.text_segments:
-                self.jump_slider.config(from_=1, to=len(self.text_segments))
-                self.jump_slider_value.set(1)
+                # Text files are memory-mapped, so only the segments on screen or being read are held in memory
+                segments = MappedTextSegments(file_path)
+                loader = segments.scan()
+        except Exception as e:
+            messagebox.showerror("File Read Error", f"Error reading file: {e}")
+            return
+        self.replace_text_segments(segments)
+        self.input_listbox.delete(0, tk.END)
+        self.listbox_offset = 0
+        self.file_loader = loader
+        self.load_file_segments(loader)
+
+    # Switch to new text segments. A memory-mapped file read before is closed, so Windows no longer locks it
+    def replace_text_segments(self, segments):
+        previous = self.text_segments
+        self.text_segments = segments
+        if self.text_prefetcher.segments is previous:
+            self.text_prefetcher.reset(None, 0)
+        if isinstance(previous, MappedTextSegments):
+            previous.close()
+
+    # Run a file loader, which adds segments to text_segments, for up to budget seconds, then let the GUI catch
+    # up and continue. Stops when another file is loaded or the listbox window is closed
+    def load_file_segments(self, loader, budget=0.02):
+        if loader is not self.file_loader:
+            return
+        if self.input_listbox is None or not self.input_listbox.winfo_exists():
+            self.file_loader = None
+            return
+        first_batch = not self.text_segments
+        rows = self.input_listbox.size()
+        shown_to_end = self.listbox_offset + rows == len(self.text_segments)
+        deadline = time.perf_counter() + budget
+        try:
+            for _ in loader:
+                if time.perf_counter() >= deadline:
+                    break
+            else:
+                self.file_loader = None
         except Exception as e:
+            self.file_loader = None
+            logging.error(f"Error reading file: {e}")
             messagebox.showerror("File Read Error", f"Error reading file: {e}")
+        if self.text_segments:
+            # Only fill the listbox up to its window; later segments are paged in when reading gets there
+            if shown_to_end and rows < self.listbox_window:
+                start = self.listbox_offset + rows
+                self.input_listbox.insert(tk.END, *self.text_segments[start:self.listbox_offset + self.listbox_window])
+            self.jump_slider.config(from_=1, to=len(self.text_segments))
+            if first_batch:
+                self.jump_slider_value.set(1)
+        if self.file_loader is loader:
+            self.root.after(1, self.load_file_segments, loader)
 
     # on_text_click: When text reading is paused, process a mouse click to get the selected text,
     # highlight it in yellow, translate it, insert the translation, and trigger TTS if enabled.
@@ -643,24 +2780,47 @@ class TranslatorApp:
             translation = self.translate_text(selected_text, self.current_target_language)
             if translation:
                 # Insert the translation into the translated output box
-                self.translated_text_box.insert(tk.END, f"\n[Selected Translation]: {translation}\n")
+                self.translated_text_box.insert(self.append_position(self.translated_text_box),
+                                                f"\n[Selected Translation]: {translation}\n")
                 # If TTS is enabled, trigger TTS for the translation
                 if self.tts_enabled.get():
                     self.speak_text(translation, origin="text")
-                # Optionally update the vertical slider based on the clicked line number
-                line_number = int(start.split('.')[0])
-                self.jump_slider_value.set(line_number)
+                # Point the vertical slider at the segment the selection starts in
+                if self.segment_index is not None:
+                    self.jump_slider_value.set(self.segment_index.segment_at(start) + 1)
         else:
             self.add_message_to_queue("Pause reading before selecting text for translation.\n")
 
+    # Returns the listbox row of a segment. When the segment is outside the window of segments in the listbox,
+    # or close to its edge while there are more segments that way, the window is moved to centre on it
+    def listbox_row(self, index):
+        size = self.input_listbox.size()
+        total = len(self.text_segments)
+        margin = self.listbox_window // 4
+        offset = self.listbox_offset
+        inside = offset <= index < offset + size
+        near_start = offset > 0 and index - offset < margin
+        near_end = offset + size < total and offset + size - index <= margin
+        if not inside or near_start or near_end:
+            offset = max(0, min(index - self.listbox_window // 2, total - self.listbox_window))
+            self.input_listbox.delete(0, tk.END)
+            self.input_listbox.insert(tk.END, *self.text_segments[offset:offset + self.listbox_window])
+            self.listbox_offset = offset
+        return index - offset
+
+    # Select a segment in the listbox and scroll to it
+    def select_listbox_segment(self, index):
+        row = self.listbox_row(index)
+        self.input_listbox.selection_clear(0, tk.END)
+        self.input_listbox.selection_set(row)
+        self.input_listbox.see(row)
+
     # Updates selection in the listbox based on a slider value
     def listbox_update_selection(self, value):
         try:
             idx = int(value) - 1
-            if 0 <= idx < self.input_listbox.size():
-                self.input_listbox.selection_clear(0, tk.END)
-                self.input_listbox.selection_set(idx)
-                self.input_listbox.see(idx)
+            if 0 <= idx < len(self.text_segments):
+                self.select_listbox_segment(idx)
         except Exception as e:
             logging.error(f"Error updating listbox selection: {e}")
 
@@ -719,9 +2879,10 @@ class TranslatorApp:
             new_index = int(value) - 1
             if new_index < 0 or new_index >= len(self.text_segments):
                 return
-            cumulative_chars = sum(len(s) for s in self.text_segments[:new_index])
-            start_index = "1.0+" + str(cumulative_chars) + " chars"
-            end_index = "1.0+" + str(cumulative_chars + len(self.text_segments[new_index])) + " chars"
+            text_range = self.segment_text_range(new_index)
+            if text_range is None:
+                return
+            start_index, end_index = text_range
             self.input_text_box.tag_remove("current", "1.0", tk.END)
             self.input_text_box.tag_add("current", start_index, end_index)
             self.input_text_box.tag_config("current", background="yellow")
@@ -730,6 +2891,15 @@ class TranslatorApp:
         except Exception as e:
             logging.error(f"Error in update_highlight_position: {e}")
 
+    # Tk start and end positions of a segment in the input textbox, or None if the textbox text was not split
+    # into the current segments
+    def segment_text_range(self, index):
+        if self.segment_index is None or len(self.segment_index) != len(self.text_segments):
+            return None
+        if not 0 <= index < len(self.segment_index):
+            return None
+        return self.segment_index.range(index)
+
     # Jump to a selected segment from the listbox
     def jump_via_listbox(self):
         if not self.text_segments:
@@ -738,10 +2908,9 @@ class TranslatorApp:
         new_index = int(self.jump_slider_value.get()) - 1
         if new_index < len(self.text_segments):
             self.text_segment_index = new_index
+            self.text_prefetcher.reset(self.text_segments, new_index)
             self.text_reading_active = True
-            self.input_listbox.selection_clear(0, tk.END)
-            self.input_listbox.selection_set(new_index)
-            self.input_listbox.see(new_index)
+            self.select_listbox_segment(new_index)
             self.add_message_to_queue(f"Jumping to segment {new_index + 1}.\n")
             logging.info(f"Jumping to segment {new_index + 1}.")
             self.current_tts_text = ""
@@ -755,14 +2924,14 @@ class TranslatorApp:
         new_index = int(self.jump_slider_value.get()) - 1
         if new_index < len(self.text_segments):
             self.text_segment_index = new_index
+            self.text_prefetcher.reset(self.text_segments, new_index)
             self.text_reading_active = True
             self.input_text_box.tag_remove("current", "1.0", tk.END)
-            cumulative_chars = sum(len(s) for s in self.text_segments[:new_index])
-            start_index = "1.0+" + str(cumulative_chars) + " chars"
-            end_index = "1.0+" + str(cumulative_chars + len(self.text_segments[new_index])) + " chars"
-            self.input_text_box.tag_add("current", start_index, end_index)
-            self.input_text_box.tag_config("current", background="yellow")
-            self.input_text_box.see(start_index)
+            text_range = self.segment_text_range(new_index)
+            if text_range is not None:
+                self.input_text_box.tag_add("current", *text_range)
+                self.input_text_box.tag_config("current", background="yellow")
+                self.input_text_box.see(text_range[0])
             self.add_message_to_queue(f"Jumping to segment {new_index + 1}.\n")
             logging.info(f"Jumping to segment {new_index + 1}.")
             self.current_tts_text = ""
@@ -775,85 +2944,74 @@ class TranslatorApp:
             messagebox.showwarning("No Text", "Please enter some text before submitting.")
             return
         self.tts_input_source = "text"
-        raw_segments = split_text_with_fallback(text, fallback_word_count=300)
-        self.text_segments = merge_short_segments(raw_segments, min_word_count=3, min_char_threshold=4)
+        self.replace_text_segments(list(iter_text_segments(text)))
+        self.segment_index = SegmentIndex(input_widget.get("1.0", "end-1c"), self.text_segments)
         self.add_message_to_queue(f"Text Input ({self.spoken_language_var.get()}): {text}\n")
-        self.translated_text_box.delete("1.0", tk.END)
-        with self.cache_lock:
-            self.translation_cache.clear()
-        self.text_segment_index = 0
-        self.text_reading_active = True
-        if self.jump_slider:
-            self.jump_slider.config(from_=1, to=len(self.text_segments))
-            self.jump_slider_value.set(1)
         if self.input_listbox is not None:
             self.input_listbox.delete(0, tk.END)
-            for segment in self.text_segments:
-                self.input_listbox.insert(tk.END, segment)
-        self.current_tts_text = ""
-        self.process_next_text_segment()
+        self.begin_text_reading()
 
-    # Submit text from the listbox for translation
+    # Submit the segments loaded into the listbox for translation. They are read as loaded rather than
+    # joined and split again, since the listbox only shows some of them
     def submit_listbox_input(self):
-        items = self.input_listbox.get(0, tk.END)
-        text = "\n".join(items)
-        if not text.strip():
+        if not any(segment.strip() for segment in self.text_segments):
             messagebox.showwarning("No Text", "Please enter some text before submitting.")
             return
         self.tts_input_source = "text"
-        self.handle_text_input(text)
+        self.add_message_to_queue(f"Text Input ({self.spoken_language_var.get()}): "
+                                  f"{len(self.text_segments)} segments\n")
+        self.begin_text_reading()
 
-    # Handle text input by setting up segments and clearing caches, then start processing
-    def handle_text_input(self, text):
-        self.add_message_to_queue(f"Text Input ({self.spoken_language_var.get()}): {text}\n")
+    # Start reading the current segments from the first one
+    def begin_text_reading(self):
         self.translated_text_box.delete("1.0", tk.END)
-        with self.cache_lock:
-            self.translation_cache.clear()
-        raw_segments = split_text_with_fallback(text, fallback_word_count=300)
-        self.text_segments = merge_short_segments(raw_segments, min_word_count=3, min_char_threshold=4)
         self.text_segment_index = 0
         self.text_reading_active = True
         if self.jump_slider:
             self.jump_slider.config(from_=1, to=len(self.text_segments))
             self.jump_slider_value.set(1)
         if self.input_listbox is not None:
-            self.input_listbox.delete(0, tk.END)
-            for segment in self.text_segments:
-                self.input_listbox.insert(tk.END, segment)
+            self.listbox_row(0)
         self.current_tts_text = ""
         self.process_next_text_segment()
 
-    # Process the next segment of text for translation and TTS
+    # Process the next segment of text for translation and TTS. The translation comes from the prefetcher;
+    # if it is not ready yet, check again shortly instead of blocking the GUI
     def process_next_text_segment(self):
+        if self.prefetch_wait_id is not None:
+            self.root.after_cancel(self.prefetch_wait_id)
+            self.prefetch_wait_id = None
         if not self.text_reading_active:
             return
         if self.text_segment_index >= len(self.text_segments):
+            # Reading caught up with a file that is still loading: wait for its next segments
+            if self.file_loader is not None:
+                self.prefetch_wait_id = self.root.after(50, self.process_next_text_segment)
             return
+        if self.text_prefetcher.segments is not self.text_segments:
+            self.text_prefetcher.reset(self.text_segments, self.text_segment_index)
         segment = self.text_segments[self.text_segment_index].strip().replace("\n", " ")
+        translated_segment = segment
+        if segment:
+            translated_segment = self.text_prefetcher.take(self.text_segment_index)
+            if translated_segment is None:
+                self.prefetch_wait_id = self.root.after(50, self.process_next_text_segment)
+                return
         if hasattr(self, "jump_slider_value"):
             self.jump_slider_value.set(self.text_segment_index + 1)
         self.text_segment_index += 1
         if self.input_listbox is not None:
-            self.input_listbox.selection_clear(0, tk.END)
-            self.input_listbox.selection_set(self.text_segment_index - 1)
-            self.input_listbox.see(self.text_segment_index - 1)
+            self.select_listbox_segment(self.text_segment_index - 1)
         elif self.input_text_box is not None:
-            cumulative_chars = sum(len(s) for s in self.text_segments[:self.text_segment_index - 1])
-            start_index = "1.0+" + str(cumulative_chars) + " chars"
-            end_index = "1.0+" + str(cumulative_chars + len(self.text_segments[self.text_segment_index - 1])) + " chars"
+            text_range = self.segment_text_range(self.text_segment_index - 1)
             self.input_text_box.tag_remove("current", "1.0", tk.END)
-            self.input_text_box.tag_add("current", start_index, end_index)
-            self.input_text_box.tag_config("current", background="yellow")
-            self.input_text_box.see(start_index)
+            if text_range is not None:
+                self.input_text_box.tag_add("current", *text_range)
+                self.input_text_box.tag_config("current", background="yellow")
+                self.input_text_box.see(text_range[0])
         if not segment:
             self.root.after(10, self.process_next_text_segment)
             return
-        # Translate only if spoken and target languages differ; otherwise, keep original text.
-        if self.map_language_for_translation(self.current_target_language) != self.map_language_for_translation(
-                self.current_spoken_language):
-            translated_segment = self.translate_text(segment, self.current_target_language)
-        else:
-            translated_segment = segment
         self.add_translation_to_queue(f"{translated_segment}\n")
         self.current_tts_text = translated_segment
         word_count = len(segment.split())
@@ -868,6 +3026,16 @@ class TranslatorApp:
         delay = int(base_delay * multiplier)
         self.root.after(delay, self.process_next_text_segment)
 
+    # Translate one text reading segment for the prefetcher (runs on its thread). Only if spoken and target
+    # languages differ; otherwise, keep original text
+    def prefetch_segment_translation(self, segments, index):
+        segment = segments[index].strip().replace("\n", " ")
+        if not segment or self.map_language_for_translation(
+                self.current_target_language) == self.map_language_for_translation(self.current_spoken_language):
+            return segment
+        self.pack_upcoming_segments(index, self.current_target_language, segments=segments)
+        return self.translate_text(segment, self.current_target_language) or segment
+
     # Pause the reading/translation of text segments
     def pause_text_reading(self):
         self.text_reading_active = False
@@ -885,7 +3053,11 @@ class TranslatorApp:
     # Flush all message and translation queues and clear audio buffers
     def flush_buffers(self):
         try:
-            self.buffered_chunks.clear()
+            with self.capture_lock:
+                self.audio_ring.clear()
+            self.recognition_backlog.clear()
+            self.recognition_reorder.reset()
+            self.last_recognized_tail = ""
             while not self.message_queue.empty():
                 self.message_queue.get_nowait()
             while not self.translation_queue.empty():
@@ -899,36 +3071,261 @@ class TranslatorApp:
             logging.error(f"Error flushing buffers: {e}")
 
     # Translate a single text segment, using cache if available
-    def _translate_single(self, text, target_language):
-        cache_key = (text.lower(), target_language)
-        with self.cache_lock:
-            if cache_key in self.translation_cache:
-                self.translation_cache.move_to_end(cache_key)
-                return self.translation_cache[cache_key]
+    def _translate_single(self, text, target_language, rate_limiter=None):
+        target_language_mapped = self.map_language_for_translation(target_language)
+        source_language_mapped = self.translation_source_language(text)
+        if source_language_mapped == target_language_mapped:
+            return text
+        cached = self.translation_cache.get(self.translation_backend.name, source_language_mapped,
+                                            target_language_mapped, text)
+        if cached is not None:
+            return cached
+        return self.request_translation(text, source_language_mapped, target_language_mapped, rate_limiter)
+
+    # Send text to the translator and cache the result under the backend that answered; with remember set it
+    # is also added to the translation memory, and with store unset it is kept in neither. A rate limiter only
+    # delays requests that go out
+    def request_translation(self, text, source_language_mapped, target_language_mapped, rate_limiter=None,
+                            remember=False, store=True):
         try:
-            target_language_mapped = self.map_language_for_translation(target_language)
-            source_language_mapped = self.map_language_for_translation(self.current_spoken_language)
-            translator = GoogleTranslator(source=source_language_mapped, target=target_language_mapped)
-            translated = translator.translate(text)
-            with self.cache_lock:
-                self.translation_cache[cache_key] = translated
-                if len(self.translation_cache) > self.cache_size:
-                    oldest = next(iter(self.translation_cache))
-                    del self.translation_cache[oldest]
+            translated, backend = self.send_translation(text, source_language_mapped, target_language_mapped,
+                                                        rate_limiter)
+            if translated and store:
+                self.translation_cache.put(backend.name, source_language_mapped, target_language_mapped, text,
+                                           translated)
+                if remember:
+                    self.translation_memory.add(source_language_mapped, target_language_mapped, text, translated,
+                                                backend=backend.name)
+            self.last_translation_error = None
             return translated
         except Exception as e:
-            self.add_translation_to_queue(f"Translation failed: {e}\n")
+            # Report a failure once rather than for every segment while the translators are down
+            if str(e) != self.last_translation_error:
+                self.last_translation_error = str(e)
+                self.add_translation_to_queue(f"Translation failed: {e}\n")
             logging.error(f"Translation failed: {e}")
             return None
 
-    # Translate text; if too long, split into smaller chunks
-    def translate_text(self, text, target_language):
+    # Source language for translating text: the selected spoken language, unless the text is identified as
+    # being in another language
+    def translation_source_language(self, text):
+        selected = self.map_language_for_translation(self.current_spoken_language)
+        if not self.detect_text_language:
+            return selected
+        detected = self.language_identifier.identify(text, preferred=selected)
+        if detected and detected != selected:
+            logging.debug(f"Text identified as {detected} instead of {selected}: {text[:40]}")
+        return detected or selected
+
+    # The selected translation backend first, then the other available failover backends in order
+    def translation_failover_order(self):
+        primary = self.translation_backend
+        return [primary] + [backend for backend in self.translation_backends.values()
+                            if backend is not primary and backend.failover and backend.available()]
+
+    # Send one request to the translation backends in failover order, without caching; returns the translation
+    # and the backend that answered, or raises if all fail. Backends whose circuit is open are skipped, and each
+    # call is limited to translation_deadline seconds
+    def send_translation(self, text, source_language_mapped, target_language_mapped, rate_limiter=None):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        with self.memo_lock:
+            self.translation_requests += 1
+        last_error = None
+        for backend in self.translation_failover_order():
+            if not backend.breaker.allow():
+                continue
+            try:
+                translated = self.call_with_deadline(backend, text, source_language_mapped, target_language_mapped,
+                                                     self.translation_deadline)
+            except Exception as e:
+                logging.warning(f"{backend.name} translation failed: {e}")
+                if backend.breaker.record_failure():
+                    logging.warning(f"{backend.name} keeps failing; not calling it for "
+                                    f"{backend.breaker.cooldown:.0f} s")
+                last_error = e
+                continue
+            backend.breaker.record_success()
+            return translated, backend
+        raise last_error or RuntimeError("all translators are paused after repeated failures")
+
+    # Run one backend call with a deadline. If it is slower than the backend's 95th percentile latency for requests
+    # of its size, a duplicate request is sent, if fewer than four are already running, and whichever answers first
+    # is used. An abandoned call finishes in the background, within the backend's own request timeout (for Google no
+    # longer than translation_deadline)
+    def call_with_deadline(self, backend, text, source_language_mapped, target_language_mapped, deadline):
+        start = time.monotonic()
+        calls = [self.translation_call_executor.submit(backend.translate, text, source_language_mapped,
+                                                       target_language_mapped)]
+        hedge_after = backend.hedge_delay(text)
+        if hedge_after is not None and hedge_after >= deadline:
+            hedge_after = None
+        last_error = None
+        while calls:
+            elapsed = time.monotonic() - start
+            if elapsed >= deadline:
+                raise TimeoutError(f"{backend.name} did not answer within {deadline:.1f} s")
+            timeout = deadline - elapsed
+            if hedge_after is not None:
+                timeout = min(timeout, max(0.0, hedge_after - elapsed))
+            done, pending = wait(calls, timeout=timeout, return_when=FIRST_COMPLETED)
+            for call in done:
+                if call.exception() is None:
+                    return call.result()
+                last_error = call.exception()
+            calls = list(pending)
+            if calls and hedge_after is not None and time.monotonic() - start >= hedge_after:
+                hedge_after = None
+                if not self.hedge_slots.acquire(blocking=False):
+                    logging.debug(f"{backend.name} slower than usual; too many duplicate requests running already")
+                    continue
+                backend.hedged += 1
+                logging.debug(f"{backend.name} slower than usual; sending a duplicate request")
+                duplicate = self.translation_call_executor.submit(backend.translate, text, source_language_mapped,
+                                                                  target_language_mapped)
+                duplicate.add_done_callback(lambda call: self.hedge_slots.release())
+                calls.append(duplicate)
+        raise last_error
+
+    # Translate many short texts in few requests: uncached texts are sent one per line, up to TRANSLATION_PACK_CHARS
+    # per request and one source language per request, and a request whose lines do not line up is retried text by
+    # text
+    def translate_packed(self, texts, target_language, rate_limiter=None):
+        target_language_mapped = self.map_language_for_translation(target_language)
+        results = [None] * len(texts)
+        pending = []
+        for index, text in enumerate(texts):
+            line = " ".join(text.split())
+            source_language_mapped = self.translation_source_language(line) if line else None
+            if not line or source_language_mapped == target_language_mapped:
+                results[index] = text
+                continue
+            cached = self.translation_cache.get(self.translation_backend.name, source_language_mapped,
+                                                target_language_mapped, line)
+            if cached is not None:
+                results[index] = cached
+                continue
+            pending.append((index, source_language_mapped, line))
+        self.send_packed(pending, results, target_language_mapped, rate_limiter)
+        return results
+
+    # Send uncached (index, source language, line) texts in packed requests and store each translation, or None if
+    # it failed, in results[index]. remember and store are passed on to request_translation()
+    def send_packed(self, pending, results, target_language_mapped, rate_limiter=None, remember=False, store=True):
+        packs = []
+        open_packs = {}  # Source language -> (pack being filled, its characters)
+        for index, source_language_mapped, line in pending:
+            pack, pack_chars = open_packs.get(source_language_mapped, (None, 0))
+            if pack is None or pack_chars + len(line) + 1 > TRANSLATION_PACK_CHARS:
+                pack, pack_chars = [], 0
+                packs.append((source_language_mapped, pack))
+            pack.append((index, line))
+            open_packs[source_language_mapped] = (pack, pack_chars + len(line) + 1)
+        for source_language_mapped, pack in packs:
+            lines = [line for _, line in pack]
+            translations = None
+            if len(pack) > 1:
+                try:
+                    response, backend = self.send_translation("\n".join(lines), source_language_mapped,
+                                                              target_language_mapped, rate_limiter)
+                    translations = unpack_translations(response, lines)
+                    if translations is None:
+                        logging.warning(f"Packed translation of {len(lines)} texts did not line up; "
+                                        f"translating them one by one.")
+                except Exception as e:
+                    logging.warning(f"Packed translation failed ({e}); translating {len(lines)} texts one by one.")
+            if translations is None:
+                translations = [self.request_translation(line, source_language_mapped, target_language_mapped,
+                                                         rate_limiter, remember, store) for line in lines]
+            elif store:
+                for line, translation in zip(lines, translations):
+                    self.translation_cache.put(backend.name, source_language_mapped, target_language_mapped, line,
+                                               translation)
+                    if remember:
+                        self.translation_memory.add(source_language_mapped, target_language_mapped, line,
+                                                    translation, backend=backend.name)
+            for (index, _), translation in zip(pack, translations):
+                results[index] = translation
+
+    # When a text segment is not cached yet, translate it together with the next few segments in packed requests,
+    # so reading them hits the cache
+    def pack_upcoming_segments(self, start, target_language, max_segments=20, segments=None):
+        segments = self.text_segments if segments is None else segments
+        if start >= len(segments):
+            return
+        target_language_mapped = self.map_language_for_translation(target_language)
+        if all(self.translation_cache.contains(self.translation_backend.name,
+                                               self.translation_source_language(sentence), target_language_mapped,
+                                               sentence)
+               for sentence in split_sentences(segments[start].strip().replace("\n", " "))):
+            return
+        sentences = []
+        chars = 0
+        for segment in segments[start:start + max_segments]:
+            segment_sentences = split_sentences(segment.strip().replace("\n", " "))
+            chars += sum(len(sentence) + 1 for sentence in segment_sentences)
+            if sentences and chars > TRANSLATION_PACK_CHARS:
+                break
+            sentences.extend(segment_sentences)
+        if len(sentences) > 1:
+            self.translate_packed(sentences, target_language)
+
+    # Translate sentence by sentence, sending only sentences not translated before (e.g. repeated by buffer overlap)
+    # together in one packed request. With fuzzy set (recognized speech), a sentence nearly the same as an earlier
+    # one reuses its translation. With store unset new translations are not cached. Returns None if any sentence
+    # could not be translated
+    def translate_sentences(self, text, target_language, fuzzy=False, store=True):
+        sentences = split_sentences(text)
+        target_language_mapped = self.map_language_for_translation(target_language)
+        backend_name = self.translation_backend.name
+        translated_sentences = [None] * len(sentences)
+        pending = []
+        avoided = 0
+        for position, sentence in enumerate(sentences):
+            source_language_mapped = self.translation_source_language(sentence)
+            if source_language_mapped == target_language_mapped:
+                # Already in the target language
+                translated_sentences[position] = sentence
+                avoided += len(sentence)
+                continue
+            translated = self.translation_cache.get(backend_name, source_language_mapped, target_language_mapped,
+                                                    sentence)
+            if translated is None and fuzzy:
+                translated = self.translation_memory.get(source_language_mapped, target_language_mapped, sentence,
+                                                         backend=backend_name)
+            if translated is not None:
+                avoided += len(sentence)
+                translated_sentences[position] = translated
+            else:
+                pending.append((position, source_language_mapped, " ".join(sentence.split())))
+        self.send_packed(pending, translated_sentences, target_language_mapped, remember=fuzzy, store=store)
+        with self.memo_lock:
+            self.memo_chars_total += sum(len(sentence) for sentence in sentences)
+            self.memo_chars_avoided += avoided
+        if not translated_sentences or not all(translated_sentences):
+            return None
+        # Chinese and Japanese do not put spaces between sentences
+        separator = "" if target_language_mapped in ("zh-CN", "zh-TW", "ja") else " "
+        return separator.join(translated_sentences)
+
+    # Summarise the characters the sentence cache kept from being translated again
+    def sentence_memo_summary(self):
+        with self.memo_lock:
+            total, avoided = self.memo_chars_total, self.memo_chars_avoided
+        minutes = max(time.monotonic() - self.memo_started, 1.0) / 60.0
+        share = 100.0 * avoided / total if total else 0.0
+        return (f"{avoided} of {total} characters served from the sentence cache ({share:.0f}%), "
+                f"{avoided / minutes:.0f} characters avoided per minute")
+
+    # Translate text; if too long, split into smaller chunks. fuzzy allows near-duplicate matches (recognized speech),
+    # and with store unset the translation is not cached (partial results)
+    def translate_text(self, text, target_language, fuzzy=False, store=True):
         max_length = 5000
         if not text.strip():
             return text
         if len(text) <= max_length:
-            return self._translate_single(text, target_language)
-        segments = split_text_with_fallback(text, fallback_word_count=300)
+            return self.translate_sentences(text, target_language, fuzzy, store)
+        segments = iter_text_segments(text)
         final_segments = []
         for seg in segments:
             if len(seg) <= max_length:
@@ -949,9 +3346,11 @@ class TranslatorApp:
                     final_segments.append(current_chunk)
         translated_segments = []
         for chunk in final_segments:
-            translated_chunk = self._translate_single(chunk, target_language)
-            if translated_chunk is not None:
-                translated_segments.append(translated_chunk)
+            translated_chunk = self.translate_sentences(chunk, target_language, fuzzy, store)
+            if translated_chunk is None:
+                # Leaving a chunk out would show a translation that silently skips part of the text
+                return None
+            translated_segments.append(translated_chunk)
         return " ".join(translated_segments)
 
     # Map locale code to a country name (if applicable)
@@ -995,6 +3394,18 @@ class TranslatorApp:
             self.translated_text_box.tag_config("current_output", background="yellow")
             logging.debug(f"Highlighted sentence from {index} to {end_index}.")
 
+    # Read the recognition sample rate from the UI (called on the main thread before capture starts)
+    def update_recognition_samplerate(self):
+        value = self.recognition_rate_var.get()
+        self.recognition_samplerate = int(value) if value.isdigit() else 0
+        logging.info(f"Recognition sample rate set to: {value}")
+
+    # Copy the capture settings out of their Tk variables, so the capture thread never calls into Tk
+    def update_capture_settings(self, *args):
+        self.flush_on_pauses = self.vad_enabled.get()
+        self.overlap_fraction = self.overlap_percentage.get() / 100.0
+        self.show_partial_results = self.partial_results_enabled.get()
+
     # Update buffer size based on slider input
     def update_buffer_size(self, value):
         try:
@@ -1067,6 +3478,20 @@ class TranslatorApp:
                                    resolution=1, font=self.dropdown_font)
         tts_rate_slider.set(100)
         tts_rate_slider.pack(side=tk.LEFT, padx=(10, 0), pady=5)
+        batch_frame = tk.Frame(translation_window, bg="#f4f4f4")
+        batch_frame.grid(row=5, column=0, sticky="ew", padx=int(10 * self.scale_factor), pady=(5, 10))
+        batch_concurrency_label = tk.Label(batch_frame, text="Batch Parallel Requests:", bg="#f4f4f4", fg="black",
+                                           font=self.label_font)
+        batch_concurrency_label.pack(side=tk.LEFT, padx=(0, 10))
+        batch_concurrency_spinbox = tk.Spinbox(batch_frame, from_=1, to=8, width=3, state="readonly",
+                                               textvariable=self.batch_concurrency_var, font=self.dropdown_font)
+        batch_concurrency_spinbox.pack(side=tk.LEFT)
+        batch_rate_label = tk.Label(batch_frame, text="Requests per Second:", bg="#f4f4f4", fg="black",
+                                    font=self.label_font)
+        batch_rate_label.pack(side=tk.LEFT, padx=(20, 10))
+        batch_rate_spinbox = tk.Spinbox(batch_frame, from_=1, to=20, width=3, state="readonly",
+                                        textvariable=self.batch_rate_var, font=self.dropdown_font)
+        batch_rate_spinbox.pack(side=tk.LEFT)
         # Batch translation button starts background processing with a progress indicator.
         batch_translate_button = tk.Button(translation_window, text="Batch Tran",
                                            command=self.batch_translate_document,
@@ -1153,6 +3578,15 @@ class TranslatorApp:
             self.add_message_to_queue(f"Error listing audio devices: {e}\n")
             logging.error(f"Error listing audio devices: {e}")
 
+    # Stop the recognition workers, partial recognition, translation calls and prefetching. Translation calls still
+    # running finish in the background; with wait_for_partials a partial recognition still running is waited for
+    def shutdown_workers(self, wait_for_partials=False):
+        self.recognition_backlog.close()
+        self.executor.shutdown(wait=True)
+        self.partial_executor.shutdown(wait=wait_for_partials)
+        self.translation_call_executor.shutdown(wait=False)
+        self.text_prefetcher.close()
+
     # Halt audio capture, stop TTS, and cleanly exit the program
     def halt_and_exit(self):
         try:
@@ -1163,8 +3597,11 @@ class TranslatorApp:
             if hasattr(self, 'tray_icon') and self.tray_icon:
                 self.tray_icon.stop()
                 logging.info("System tray icon stopped.")
-            self.executor.shutdown(wait=True)
+            self.shutdown_workers()
             logging.info("ThreadPoolExecutor shutdown.")
+            logging.info(f"Translation cache: {self.translation_cache.summary()}")
+            self.translation_cache.close()
+            self.reset_translation_backends()
             self.root.quit()
             self.root.destroy()
             logging.info("Application halted and exited.")
@@ -1235,7 +3672,7 @@ class TranslatorApp:
 
     # Inserts text into a widget while maintaining a maximum number of lines
     def insert_text_with_limit(self, text_widget, message, max_lines):
-        text_widget.insert(tk.END, message)
+        text_widget.insert(self.append_position(text_widget), message)
         text_widget.yview_moveto(1.0)
         current_lines = int(text_widget.index('end-1c').split('.')[0])
         if current_lines > max_lines:
@@ -1301,52 +3738,29 @@ class TranslatorApp:
 
     # Remove overlapping text from consecutive recognition results
     def remove_overlap(self, new_text, previous_tail):
-        translator_obj = str.maketrans('', '', string.punctuation)
-        norm_new = new_text.lower().translate(translator_obj)
-        norm_tail = previous_tail.lower().translate(translator_obj)
-        new_words = norm_new.split()
-        tail_words = norm_tail.split()
-        if not tail_words or not new_words:
-            return new_text
-        matcher = difflib.SequenceMatcher(None, tail_words, new_words)
-        match = matcher.find_longest_match(0, len(tail_words), 0, len(new_words))
-        if match.size >= 2:
-            original_new_words = new_text.split()
-            cleaned = " ".join(original_new_words[match.b + match.size:])
-            return cleaned
-        return new_text
-
-    # Process an audio buffer: recognize speech, remove overlaps, translate, and queue output
-    def process_audio_buffer(self, spoken_language_code, target_language_code, audio_data):
-        recognizer = sr.Recognizer()
+        return remove_text_overlap(new_text, previous_tail)
+
+    # Process an audio buffer: recognize speech and translate it, then pass the result on for ordered delivery
+    def process_audio_buffer(self, sequence, job):
+        backend = self.recognizer_backend
+        spoken_language_code = job.spoken_language_code
+        target_language_code = job.target_language_code
+        result = None
         try:
             self.tts_input_source = "audio"
-            logging.debug("Processing audio buffer...")
-            combined_audio = np.concatenate(audio_data, axis=0)
-            audio_data_int16 = np.int16(combined_audio * 32767)
-            audio_bytes = audio_data_int16.tobytes()
-            audio = sr.AudioData(audio_bytes, self.samplerate, 2)
-            recognized_text = recognizer.recognize_google(audio, language=spoken_language_code)
-            current_language = self.spoken_language_var.get()
-            if recognized_text.strip():
-                if self.last_reported_language != current_language:
-                    self.add_message_to_queue(f"{current_language} selected ")
-                    self.last_reported_language = current_language
-                cleaned_text = self.remove_overlap(recognized_text, self.last_recognized_tail)
-                self.last_recognized_tail = " ".join(recognized_text.split()[-5:])
-                self.add_message_to_queue(f": {cleaned_text} ")
-                logging.debug(f"Recognized Text: {cleaned_text}")
-            else:
-                logging.debug("No meaningful text recognized.")
+            logging.debug(f"Processing audio buffer {sequence} with {backend.name}...")
+            recognized_text = backend.recognize(job.audio_bytes, job.sample_rate, spoken_language_code)
             if self.map_language_for_translation(target_language_code) != self.map_language_for_translation(
                     spoken_language_code):
-                translated_text = self.translate_text(recognized_text, target_language_code)
-                if translated_text:
-                    self.add_translation_to_queue(f"{translated_text} ")
-                    logging.debug(f"Translated Text: {translated_text}")
+                # Without a translation the recognized text is shown, so captions keep flowing
+                translated_text = (self.translate_text(recognized_text, target_language_code, fuzzy=True)
+                                   or recognized_text)
             else:
-                self.add_translation_to_queue(f"{recognized_text} ")
+                translated_text = recognized_text
                 logging.debug("Spoken and target languages are the same. No translation needed.")
+            job.recognized_text = recognized_text
+            job.translated_text = translated_text
+            result = job
         except sr.UnknownValueError:
             logging.error("Speech recognition could not understand audio.")
         except sr.RequestError as e:
@@ -1355,41 +3769,231 @@ class TranslatorApp:
         except Exception as e:
             self.add_message_to_queue(f"Error processing audio: {e}\n")
             logging.exception("Unexpected error during audio processing.")
+        finally:
+            # Every sequence number is completed, even on failure, so later results are not held back
+            self.recognition_reorder.complete(sequence, result)
+
+    # Deliver one recognition result in sequence order: remove overlap and queue text and translation
+    def deliver_recognition_result(self, sequence, job):
+        if job is None:
+            # Skipped or failed buffer: the next buffer no longer overlaps anything we have shown
+            self.last_recognized_tail = ""
+            return
+        recognized_text = job.recognized_text
+        translated_text = job.translated_text
+        spoken_language_code = job.spoken_language_code
+        # The final text replaces any partial text shown for this utterance
+        self.partial_queue.put(("final", job.utterance_id, None, None))
+        if recognized_text.strip():
+            current_language = self.language_code_to_name.get(spoken_language_code, spoken_language_code)
+            if self.last_reported_language != current_language:
+                self.add_message_to_queue(f"{current_language} selected ")
+                self.last_reported_language = current_language
+            if job.overlap_samples > 0:
+                cleaned_text = self.remove_overlap(recognized_text, self.last_recognized_tail)
+            else:
+                cleaned_text = recognized_text
+            self.last_recognized_tail = overlap_tail(recognized_text)
+            self.add_message_to_queue(f": {cleaned_text} ")
+            logging.debug(f"Recognized Text ({sequence}): {cleaned_text}")
+        else:
+            logging.debug("No meaningful text recognized.")
+        if translated_text:
+            self.add_translation_to_queue(f"{translated_text} ")
+            logging.debug(f"Translated Text ({sequence}): {translated_text}")
+
+    # Periodically skip recognition results that are holding back later ones, and show the backlog depth
+    def check_recognition_order(self):
+        try:
+            self.recognition_reorder.expire()
+            self.backlog_depth_var.set(f"Backlog: {len(self.recognition_backlog)}")
+        except Exception as e:
+            logging.error(f"Error checking recognition order: {e}")
+        finally:
+            self.root.after(250, self.check_recognition_order)
 
-    # Wrapper for processing audio buffers in a separate thread
-    def worker_thread(self, task):
-        spoken_language_code, target_language_code, audio_data = task
-        self.process_audio_buffer(spoken_language_code, target_language_code, audio_data)
+    # Recognition worker: take segments from the backlog until it is closed
+    def recognition_worker_loop(self):
+        while True:
+            item = self.recognition_backlog.get()
+            if item is None:
+                return
+            sequence, job = item
+            self.process_audio_buffer(sequence, job)
 
-    # Callback function for the audio input stream
-    def audio_callback(self, indata, frames, time, status):
+    # Recognize the utterance so far and show it as partial text, at most one request at a time
+    def maybe_recognize_partial(self, new_samples):
+        if not self.show_partial_results:
+            return
+        self.samples_since_partial += new_samples
+        if self.partial_in_flight or self.samples_since_partial < self.partial_interval * self.samplerate:
+            return
+        self.samples_since_partial = 0
+        recognition_rate = min(self.samplerate, self.recognition_samplerate or self.samplerate)
+        with self.capture_lock:
+            window = self.audio_ring.window()[-int(self.partial_window * self.samplerate):]
+            audio_bytes = resample_audio(window, self.samplerate, recognition_rate).tobytes()
+        self.partial_in_flight = True
+        self.partial_executor.submit(self.recognize_partial, self.utterance_id, self.current_spoken_language,
+                                     self.current_target_language, audio_bytes, recognition_rate)
+
+    # Worker for partial results: recognize and translate a sliding window, then queue it for display
+    def recognize_partial(self, utterance_id, spoken_language_code, target_language_code, audio_bytes, sample_rate):
         try:
-            if status:
-                self.add_message_to_queue(f"Audio input error: {status}\n")
-                logging.warning(f"Audio input error: {status}")
-            indata = indata * self.gain
-            silence_threshold = 0.02
-            if np.linalg.norm(indata) < silence_threshold:
-                logging.debug("Silence detected. Skipping this chunk.")
+            recognized_text = self.recognizer_backend.recognize(audio_bytes, sample_rate, spoken_language_code)
+            if utterance_id != self.utterance_id or not recognized_text.strip():
                 return
-            self.buffered_chunks.append(indata.copy())
-            volume_norm = np.linalg.norm(indata) * 10
-            mic_level = min(volume_norm, 100)
-            self.mic_level_queue.put(mic_level)
-            current_buffer_size = self.buffer_size_var.get()
-            if len(self.buffered_chunks) >= current_buffer_size:
-                spoken_language_code = self.current_spoken_language
-                target_language_code = self.current_target_language
-                self.executor.submit(self.worker_thread,
-                                     (spoken_language_code, target_language_code, self.buffered_chunks.copy()))
-                logging.debug(f"Enqueued audio buffer with {len(self.buffered_chunks)} chunks for processing.")
-                overlap = self.overlap_percentage.get() / 100.0
-                retain_chunks = int(overlap * len(self.buffered_chunks))
-                self.buffered_chunks = self.buffered_chunks[-retain_chunks:] if retain_chunks > 0 else []
+            if self.map_language_for_translation(target_language_code) != self.map_language_for_translation(
+                    spoken_language_code):
+                # A partial result is usually a cut-off sentence, so it is not stored in the cache or memory
+                translated_text = (self.translate_text(recognized_text, target_language_code, fuzzy=True,
+                                                       store=False) or recognized_text)
+            else:
+                translated_text = recognized_text
+            self.partial_queue.put(("partial", utterance_id, recognized_text, translated_text))
+        except sr.UnknownValueError:
+            pass
+        except Exception as e:
+            logging.debug(f"Partial recognition failed: {e}")
+        finally:
+            self.partial_in_flight = False
+
+    # Replace the partial text shown in a text box (text=None just removes it). The partial_start mark stays at its
+    # start, so text appended meanwhile goes in before it
+    def show_partial_text(self, text_widget, text):
+        ranges = text_widget.tag_ranges("partial")
+        if ranges:
+            text_widget.delete(ranges[0], ranges[-1])
+        if text:
+            start = text_widget.index("end-1c")
+            text_widget.insert(tk.END, text, "partial")
+            text_widget.mark_set("partial_start", start)
+            text_widget.tag_config("partial", foreground="gray50")
+            text_widget.yview_moveto(1.0)
+
+    # Where to append text to a text box: before the partial result if one is shown, otherwise at the end
+    def append_position(self, text_widget):
+        return "partial_start" if text_widget.tag_ranges("partial") else tk.END
+
+    # Periodically show partial results and remove them once the final result has arrived
+    def update_partial_text(self):
+        try:
+            while not self.partial_queue.empty():
+                kind, utterance_id, recognized_text, translated_text = self.partial_queue.get_nowait()
+                if kind == "final":
+                    self.finalized_utterance_id = max(self.finalized_utterance_id, utterance_id)
+                    if self.partial_display_id is not None and self.partial_display_id <= utterance_id:
+                        self.show_partial_text(self.output_window_text_box, None)
+                        self.show_partial_text(self.translated_text_box, None)
+                        self.partial_display_id = None
+                elif kind == "partial" and utterance_id > self.finalized_utterance_id:
+                    self.show_partial_text(self.output_window_text_box, f" ... {recognized_text}")
+                    self.show_partial_text(self.translated_text_box, f" ... {translated_text}")
+                    self.partial_display_id = utterance_id
+                elif kind == "clear":
+                    self.show_partial_text(self.output_window_text_box, None)
+                    self.show_partial_text(self.translated_text_box, None)
+                    self.partial_display_id = None
+        except Exception as e:
+            logging.error(f"Error updating partial text: {e}")
+        finally:
+            self.root.after(100, self.update_partial_text)
+
+    # Hand the buffered audio window to the recognition backlog, keeping retain_samples for overlap. The capture
+    # lock is released before the backlog is given the job, since under the Block policy that waits for a worker
+    def dispatch_audio_buffer(self, retain_samples=0):
+        recognition_rate = min(self.samplerate, self.recognition_samplerate or self.samplerate)
+        with self.capture_lock:
+            buffered_samples = len(self.audio_ring)
+            # Resample straight from the ring view; the output is the single copy handed to sr.AudioData
+            audio_bytes = resample_audio(self.audio_ring.window(), self.samplerate, recognition_rate).tobytes()
+            overlap_samples = int(self.last_dispatch_retained * recognition_rate / self.samplerate)
+            self.audio_ring.retain(retain_samples)
+            self.last_dispatch_retained = min(retain_samples, len(self.audio_ring))
+        job = RecognitionJob(self.current_spoken_language, self.current_target_language, audio_bytes,
+                             recognition_rate, overlap_samples, self.utterance_id)
+        # Partial results still in flight for this utterance are now stale
+        self.utterance_id += 1
+        self.samples_since_partial = 0
+        self.recognition_backlog.put(job)
+        logging.debug(f"Enqueued audio buffer with {buffered_samples} samples for processing "
+                      f"(backlog depth {len(self.recognition_backlog)}).")
+
+    # Callback function for the audio input stream: only copies the block into the capture queue
+    def audio_callback(self, indata, frames, time, status):
+        try:
+            if status.input_overflow:
+                self.input_overflows += 1
+            self.capture_queue.put(indata[:, 0])
         except Exception as e:
-            self.add_message_to_queue(f"Error in audio callback: {e}\n")
             logging.error(f"Error in audio callback: {e}")
 
+    # Apply gain, meter the level, buffer and dispatch one captured block (runs on the capture thread). The audio
+    # ring is only changed while holding capture_lock, which flush_buffers takes from the GUI thread
+    def process_captured_block(self, samples):
+        volume = np.linalg.norm(samples) * self.gain
+        mic_level = min(volume * 10, 100)
+        self.mic_level_queue.put(mic_level)
+        max_samples = self.buffer_size * self.chunk_size
+        if self.flush_on_pauses and self.vad is not None:
+            vad_state = self.vad.feed(samples, self.gain)
+            with self.capture_lock:
+                self.audio_ring.write(samples, self.gain)
+                if vad_state == VAD_SILENCE:
+                    # Keep only the pre-roll so the start of the next utterance is not clipped
+                    self.audio_ring.retain(self.vad.preroll_samples)
+                    return
+            if vad_state == VAD_END:
+                if self.vad.utterance_is_valid():
+                    logging.debug("End of utterance detected. Flushing segment.")
+                    self.dispatch_audio_buffer(retain_samples=0)
+                else:
+                    logging.debug("Utterance too short. Discarding segment.")
+                    with self.capture_lock:
+                        self.audio_ring.clear()
+                    self.partial_queue.put(("final", self.utterance_id, None, None))
+                    self.utterance_id += 1
+                    self.samples_since_partial = 0
+                self.vad.reset()
+            elif len(self.audio_ring) >= max_samples:
+                # Buffer size acts as the maximum segment length during long utterances
+                self.dispatch_audio_buffer(retain_samples=int(self.overlap_fraction * len(self.audio_ring)))
+            else:
+                self.maybe_recognize_partial(len(samples))
+            return
+        silence_threshold = 0.02
+        if volume < silence_threshold:
+            logging.debug("Silence detected. Skipping this chunk.")
+            return
+        with self.capture_lock:
+            self.audio_ring.write(samples, self.gain)
+        if len(self.audio_ring) >= max_samples:
+            self.dispatch_audio_buffer(retain_samples=int(self.overlap_fraction * len(self.audio_ring)))
+        else:
+            self.maybe_recognize_partial(len(samples))
+
+    # Consume captured blocks until capture stops, reporting any callback overruns
+    def drain_capture_queue(self):
+        reported_overflows = 0
+        reported_drops = 0
+        while self.is_listening and not self.audio_stop_event.is_set():
+            samples = self.capture_queue.peek()
+            if samples is None:
+                time.sleep(0.005)
+                continue
+            try:
+                self.process_captured_block(samples)
+            except Exception as e:
+                self.add_message_to_queue(f"Error processing captured audio: {e}\n")
+                logging.error(f"Error processing captured audio: {e}")
+            finally:
+                self.capture_queue.release()
+            if self.input_overflows != reported_overflows or self.capture_queue.dropped != reported_drops:
+                reported_overflows = self.input_overflows
+                reported_drops = self.capture_queue.dropped
+                logging.warning(f"Audio input overruns: {reported_overflows} overflows, "
+                                f"{reported_drops} dropped blocks.")
+
     # Start capturing audio from the selected device
     def start_audio_capture(self, device_index):
         try:
@@ -1397,10 +4001,18 @@ class TranslatorApp:
             logging.info("Starting audio capture.")
             device_info = sd.query_devices(device_index, 'input')
             self.samplerate = int(device_info["default_samplerate"])
+            self.audio_ring.clear()
+            self.capture_queue.clear()
+            self.input_overflows = 0
+            self.capture_queue.dropped = 0
+            self.vad = VoiceActivityDetector(self.samplerate, self.chunk_size)
             with sd.InputStream(callback=self.audio_callback, channels=1, samplerate=self.samplerate,
                                 device=device_index, blocksize=self.chunk_size):
-                while self.is_listening and not self.audio_stop_event.is_set():
-                    sd.sleep(50)
+                self.drain_capture_queue()
+            self.add_message_to_queue(f"Audio input overruns this session: {self.input_overflows} overflows, "
+                                      f"{self.capture_queue.dropped} dropped blocks.\n")
+            self.partial_queue.put(("clear", 0, None, None))
+            self.report_recognizer_latency()
         except Exception as e:
             self.add_message_to_queue(f"Error during audio capture: {e}\n")
             logging.error(f"Error during audio capture: {e}")
@@ -1413,6 +4025,7 @@ class TranslatorApp:
                 self.start_button.config(text="Stop Audio Capture", bg="silver", fg="black")
                 device_index = self.get_selected_device_index()
                 if device_index is not None:
+                    self.update_recognition_samplerate()
                     self.audio_stop_event.clear()
                     self.audio_thread = threading.Thread(target=self.start_audio_capture, args=(device_index,),
                                                          daemon=True)
@@ -1800,15 +4413,73 @@ class TranslatorApp:
     def update_spoken_language(self, *args):
         try:
             self.current_spoken_language = self.languages.get(self.spoken_language_var.get(), "en")
+            self.reset_translation_backends()
+            self.language_identifier.reset()
+            self.text_prefetcher.reset(self.text_segments, self.text_segment_index)
             logging.debug(f"Spoken language updated to: {self.current_spoken_language}")
         except Exception as e:
             self.add_message_to_queue(f"Error updating spoken language: {e}\n")
             logging.error(f"Error updating spoken language: {e}")
 
+    # Switch the speech recognition backend based on user selection
+    def update_recognizer_backend(self, *args):
+        try:
+            self.recognizer_backend = self.recognizer_backends[self.recognizer_backend_var.get()]
+            self.add_message_to_queue(f"Speech recognizer set to: {self.recognizer_backend.name}\n")
+            logging.info(f"Speech recognizer set to: {self.recognizer_backend.name}")
+        except Exception as e:
+            self.add_message_to_queue(f"Error updating speech recognizer: {e}\n")
+            logging.error(f"Error updating speech recognizer: {e}")
+
+    # Switch the translation backend based on user selection
+    def update_translation_backend(self, *args):
+        try:
+            self.translation_backend = self.translation_backends[self.translation_backend_var.get()]
+            self.add_message_to_queue(f"Translator set to: {self.translation_backend.name}\n")
+            logging.info(f"Translator set to: {self.translation_backend.name}")
+        except Exception as e:
+            self.add_message_to_queue(f"Error updating translator: {e}\n")
+            logging.error(f"Error updating translator: {e}")
+
+    # Drop per-language-pair clients and models so they are rebuilt for the new languages
+    def reset_translation_backends(self):
+        for backend in self.translation_backends.values():
+            backend.reset()
+
+    # Turn language identification of the text to translate on or off
+    def update_language_detection(self, *args):
+        self.detect_text_language = self.detect_language_var.get()
+        logging.info(f"Text language detection {'on' if self.detect_text_language else 'off'}")
+
+    # Change how the recognition backlog behaves when it is full
+    def update_backlog_policy(self, *args):
+        self.recognition_backlog.policy = self.backlog_policy_var.get()
+        logging.info(f"Recognition backlog policy set to: {self.recognition_backlog.policy}")
+
+    # Report per-backend recognition latency
+    def report_recognizer_latency(self):
+        for backend in list(self.recognizer_backends.values()) + list(self.translation_backends.values()):
+            if backend.stats.calls:
+                kind = "recognizer" if isinstance(backend, RecognizerBackend) else "translator"
+                summary = f"{backend.name} {kind} latency: {backend.summary()}"
+                self.add_message_to_queue(summary + "\n")
+                logging.info(summary)
+        summary = f"Translation: {self.sentence_memo_summary()}"
+        self.add_message_to_queue(summary + "\n")
+        logging.info(summary)
+        summary = f"Translation memory: {self.translation_memory.summary()}"
+        self.add_message_to_queue(summary + "\n")
+        logging.info(summary)
+        summary = f"Language identification: {self.language_identifier.summary()}"
+        self.add_message_to_queue(summary + "\n")
+        logging.info(summary)
+
     # Update target language based on user selection and update TTS voice accordingly
     def update_target_language(self, *args):
         try:
             self.current_target_language = self.languages.get(self.target_language_var.get(), "en")
+            self.reset_translation_backends()
+            self.text_prefetcher.reset(self.text_segments, self.text_segment_index)
             logging.debug(f"Target language updated to: {self.current_target_language}")
             self.update_tts_voice_selection()
         except Exception as e:
@@ -1849,18 +4520,16 @@ class TranslatorApp:
         self.tts_enabled.set(False)
         self.add_message_to_queue("TTS turned off for batch translation.\n")
 
-        # Gather text from listbox or textbox.
-        text = ""
-        if self.input_listbox is not None and self.input_listbox.size() > 0:
-            items = self.input_listbox.get(0, tk.END)
-            text = "\n".join(items)
+        # Gather the segments loaded into the listbox, or split the textbox text.
+        if self.input_listbox is not None and self.text_segments:
+            merged_segments = list(self.text_segments)
         elif self.input_text_box is not None:
-            text = self.input_text_box.get("1.0", tk.END).strip()
+            merged_segments = list(iter_text_segments(self.input_text_box.get("1.0", tk.END).strip()))
         else:
             self.root.after(0,
                             lambda: messagebox.showinfo("No Document", "No text document is loaded for translation."))
             return
-        if not text.strip():
+        if not merged_segments:
             self.root.after(0, lambda: messagebox.showinfo("Empty Document", "The loaded document is empty."))
             return
 
@@ -1877,44 +4546,1026 @@ class TranslatorApp:
 
         progress_win, progress_bar = create_progress_window()
 
-        # Clear previous output and translation cache.
+        # Clear previous output; cached translations are kept so re-reading a document is not re-translated.
         self.root.after(0, lambda: self.translated_text_box.delete("1.0", tk.END))
-        with self.cache_lock:
-            self.translation_cache.clear()
 
-        # Split the document into manageable segments.
-        segments = split_text_with_fallback(text, fallback_word_count=300)
-        merged_segments = merge_short_segments(segments, min_word_count=3, min_char_threshold=4)
         total_segments = len(merged_segments)
 
         # Set the progress bar maximum value.
         self.root.after(0, lambda: progress_bar.config(maximum=total_segments))
 
-        translated_segments = []
-        # Translate each segment sequentially.
-        for idx, seg in enumerate(merged_segments):
-            translated_seg = self._translate_single(seg, self.current_target_language)
-            if translated_seg is None:
-                translated_seg = ""
-            translated_segments.append(translated_seg)
-            # Update the progress bar on the main thread.
-            self.root.after(0, lambda v=idx + 1: progress_bar.config(value=v))
-            self.add_message_to_queue(f"Wait.Translating {idx + 1}/{total_segments}.\n")
+        # Update the progress bar on the main thread as each segment completes.
+        def report_progress(done, total):
+            self.root.after(0, lambda v=done: progress_bar.config(value=v))
+            self.add_message_to_queue(f"Wait.Translating {done}/{total}.\n")
+
+        # Translate the segments in parallel; they come back in document order.
+        translated_segments = self.translate_segments_concurrently(
+            merged_segments, self.current_target_language, concurrency=self.batch_concurrency_var.get(),
+            rate_limit=self.batch_rate_var.get(), on_progress=report_progress)
 
         translated_text = " ".join(translated_segments)
-        self.root.after(0, lambda: self.translated_text_box.insert(tk.END, translated_text))
+        self.root.after(0, lambda: self.translated_text_box.insert(self.append_position(self.translated_text_box),
+                                                                   translated_text))
         self.add_message_to_queue("Batch translation completed.\n")
 
         # Close the progress window.
         self.root.after(0, progress_win.destroy)
 
-    # Entry point for batch translation from the translation window; runs in a background thread.
+    # Translate segments on a bounded worker pool under a rate limit; results are returned in input order.
+    # With pack=True consecutive segments share requests of up to TRANSLATION_PACK_CHARS characters.
+    def translate_segments_concurrently(self, segments, target_language, concurrency=4, rate_limit=None,
+                                        on_progress=None, pack=True):
+        rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+        groups = []
+        group_chars = 0
+        for index, segment in enumerate(segments):
+            if not pack or not groups or group_chars + len(segment) + 1 > TRANSLATION_PACK_CHARS:
+                groups.append([])
+                group_chars = 0
+            groups[-1].append(index)
+            group_chars += len(segment) + 1
+        translated_segments = [""] * len(segments)
+        done = 0
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            futures = {pool.submit(self.translate_packed, [segments[index] for index in group], target_language,
+                                   rate_limiter): group for group in groups}
+            for future in as_completed(futures):
+                group = futures[future]
+                try:
+                    for index, translated in zip(group, future.result()):
+                        translated_segments[index] = translated or ""
+                except Exception as e:
+                    logging.error(f"Batch translation of segments {group[0] + 1}-{group[-1] + 1} failed: {e}")
+                done += len(group)
+                if on_progress is not None:
+                    on_progress(done, len(segments))
+        return translated_segments
+
+    # Entry point for batch translation from the translation window; runs in a background thread. Not while a file
+    # is still loading, which would translate only part of it
     def batch_translate_document(self):
+        if self.file_loader is not None:
+            messagebox.showinfo("Still Loading", "The file is still loading. Please try again when it has loaded.")
+            return
         threading.Thread(target=self.batch_translate_in_background, daemon=True).start()
 
 
+# Path of a file that ships next to this script (the sample book and manuals the benchmarks read), whatever the
+# working directory
+def app_file(name):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+
+
+# Generate a few seconds of speech-like test audio (harmonics with syllable-rate modulation)
+def synthetic_speech(samplerate, seconds=10.0, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(samplerate * seconds)) / samplerate
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / samplerate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 12))
+    envelope = np.clip(np.sin(2 * np.pi * 3.0 * t), 0, None)
+    audio = 0.25 * voiced * envelope + 0.01 * rng.standard_normal(len(t))
+    return np.clip(audio * 32767, -32768, 32767).astype(np.int16)
+
+
+# Benchmark: CPU cost of resampling and the upload payload saved per second of audio
+def benchmark_resampling(target_rate=16000, seconds=10.0, repeats=5):
+    print(f"Resampling to {target_rate} Hz, {seconds:.0f} s of audio, best of {repeats}")
+    for source_rate in (44100, 48000):
+        samples = synthetic_speech(source_rate, seconds)
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.process_time()
+            resampled = resample_audio(samples, source_rate, target_rate)
+            best = min(best, time.process_time() - start)
+        raw_before = len(samples) * 2
+        raw_after = len(resampled) * 2
+        print(f"  {source_rate} Hz: {1000 * best / seconds:.2f} ms CPU per second of audio")
+        print(f"    PCM payload {raw_before / seconds / 1024:.1f} KiB/s -> {raw_after / seconds / 1024:.1f} KiB/s "
+              f"({100 * (1 - raw_after / raw_before):.0f}% smaller)")
+        try:
+            start = time.perf_counter()
+            flac_before = sr.AudioData(samples.tobytes(), source_rate, 2).get_flac_data()
+            flac_before_time = time.perf_counter() - start
+            start = time.perf_counter()
+            flac_after = sr.AudioData(resampled.tobytes(), target_rate, 2).get_flac_data()
+            flac_after_time = time.perf_counter() - start
+            print(f"    FLAC upload {len(flac_before) / seconds / 1024:.1f} KiB/s -> "
+                  f"{len(flac_after) / seconds / 1024:.1f} KiB/s, encode {1000 * flac_before_time:.0f} ms -> "
+                  f"{1000 * flac_after_time:.0f} ms")
+        except Exception as e:
+            print(f"    FLAC comparison skipped: {e}")
+
+
+# Previous word-based overlap removal with difflib, kept as the benchmark baseline
+def remove_overlap_difflib(new_text, previous_tail):
+    translator_obj = str.maketrans('', '', string.punctuation)
+    new_words = new_text.lower().translate(translator_obj).split()
+    tail_words = previous_tail.lower().translate(translator_obj).split()
+    if not tail_words or not new_words:
+        return new_text
+    matcher = difflib.SequenceMatcher(None, tail_words, new_words)
+    match = matcher.find_longest_match(0, len(tail_words), 0, len(new_words))
+    if match.size >= 2:
+        return " ".join(new_text.split()[match.b + match.size:])
+    return new_text
+
+
+# Benchmark: overlap removal speed and correctness against the difflib version, across scripts
+def benchmark_overlap_removal(repeats=2000):
+    # (previous recognition, new recognition that repeats its end, expected cleaned text)
+    cases = {
+        "English": ("we will meet at the station tomorrow morning",
+                    "station tomorrow morning and then take the train to the city",
+                    "and then take the train to the city"),
+        "French": ("nous allons au marché près de la gare",
+                   "près de la gare pour acheter du pain frais",
+                   "pour acheter du pain frais"),
+        "Hindi": ("हम कल सुबह स्टेशन पर मिलेंगे",
+                  "स्टेशन पर मिलेंगे और फिर ट्रेन लेंगे",
+                  "और फिर ट्रेन लेंगे"),
+        "Chinese": ("我们明天早上在火车站见面",
+                    "在火车站见面然后坐火车去城里",
+                    "然后坐火车去城里"),
+        "Japanese": ("明日の朝に駅で会いましょう",
+                     "駅で会いましょうそれから電車で街へ行きます",
+                     "それから電車で街へ行きます"),
+        "Thai": ("พรุ่งนี้เช้าเราจะเจอกันที่สถานี",
+                 "เจอกันที่สถานีแล้วนั่งรถไฟเข้าเมือง",
+                 "แล้วนั่งรถไฟเข้าเมือง"),
+    }
+    print(f"Overlap removal, {repeats} calls per case")
+    print(f"  {'case':10} {'difflib us':>11} {'n-gram us':>11}  difflib ok  n-gram ok")
+    for name, (previous, new, expected) in cases.items():
+        timings = []
+        outputs = []
+        for function, tail in ((remove_overlap_difflib, " ".join(previous.split()[-5:])),
+                               (remove_text_overlap, overlap_tail(previous))):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                output = function(new, tail)
+            timings.append(1e6 * (time.perf_counter() - start) / repeats)
+            outputs.append(output.strip() == expected)
+        print(f"  {name:10} {timings[0]:11.1f} {timings[1]:11.1f}  {str(outputs[0]):10}  {outputs[1]}")
+    # Scaling with tail length, using a small vocabulary so words repeat as in real speech
+    rng = np.random.default_rng(1)
+    vocabulary = "the a and of to in is it that was he for on are with as his they at be this have from".split()
+    for size in (250, 1000, 4000):
+        words = list(rng.choice(vocabulary, size * 2))
+        previous = " ".join(words[:size])
+        new = " ".join(words[size // 2:size + size // 2])
+        results = []
+        for function in (remove_overlap_difflib, remove_text_overlap):
+            start = time.perf_counter()
+            output = function(new, previous)
+            results.append((1000 * (time.perf_counter() - start), size - len(output.split())))
+        print(f"  {size}-word tail: difflib {results[0][0]:.1f} ms removed {results[0][1]}, "
+              f"n-gram {results[1][0]:.1f} ms removed {results[1][1]} (expected {size // 2})")
+
+
+# Read a WAV file as float32 mono samples in [-1, 1], like a sounddevice input stream delivers them
+def read_wav_mono(path):
+    samplerate, data = read(path)
+    if data.dtype == np.uint8:
+        data = (data.astype(np.float32) - 128) / 128
+    elif np.issubdtype(data.dtype, np.integer):
+        data = data.astype(np.float32) / (np.iinfo(data.dtype).max + 1)
+    else:
+        data = data.astype(np.float32)
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    return int(samplerate), data
+
+
+# Headless TranslatorApp that replays WAV files through the capture pipeline
+class ReplayTranslatorApp(TranslatorApp):
+    """
+    Feeds WAV files through audio_callback in chunk_size blocks, at real-time
+    speed or as fast as the capture thread takes them, with scripted stand-ins
+    for recognition and translation. Only the pipeline is set up; no window is
+    created, so the same code paths can be timed without a microphone or network.
+    """
+
+    def __init__(self, recognizer, translator=None, target_language="fr", policy=BACKLOG_DROP_OLDEST):
+        self.root = tk.Tcl()
+        # Memory-only cache so runs are reproducible and the user's cache is left alone
+        self.init_pipeline(cache_path=None)
+        self.recognizer_backend = recognizer
+        # Only the stand-in translator, so a failure can never fail over to the network
+        self.translation_backend = translator or ScriptedTranslationBackend()
+        self.translation_backends = OrderedDict([(self.translation_backend.name, self.translation_backend)])
+        self.current_target_language = target_language
+        self.recognition_backlog.policy = policy
+        self.tts_input_source = "audio"
+        self.utterance_latencies = []
+        self.block_fed_at = deque()  # When each block still in the capture queue was fed
+        self.speech_ended_at = {}  # Utterance id -> when its last speech block was fed
+
+    # Record the latency of each delivered segment, from the end of its speech in the replayed audio to display.
+    # The endpointer hangover is included; a segment with no speech block on record is timed from its dispatch
+    def deliver_recognition_result(self, sequence, job):
+        super().deliver_recognition_result(sequence, job)
+        if job is not None:
+            spoken_at = self.speech_ended_at.pop(job.utterance_id, job.dispatched_at)
+            self.utterance_latencies.append((job.utterance_id, time.perf_counter() - spoken_at, job.recognized_text))
+
+    # Note when each block is handed to the capture queue (runs on the feeder thread)
+    def audio_callback(self, indata, frames, time_info, status):
+        self.block_fed_at.append(time.perf_counter())
+        dropped = self.capture_queue.dropped
+        super().audio_callback(indata, frames, time_info, status)
+        if self.capture_queue.dropped != dropped:
+            self.block_fed_at.pop()
+
+    # Remember when the last speech block of the current utterance was fed
+    def process_captured_block(self, samples):
+        fed_at = self.block_fed_at.popleft()
+        utterance_id = self.utterance_id
+        super().process_captured_block(samples)
+        if self.flush_on_pauses and self.vad is not None and self.vad.in_utterance and not self.vad.silent_blocks:
+            self.speech_ended_at[utterance_id] = fed_at
+
+    # Wait until the capture thread has processed every queued block
+    def wait_for_capture_queue(self):
+        while len(self.capture_queue):
+            time.sleep(0.001)
+
+    # Replay the files; speed 1.0 is real time and 0 feeds blocks as fast as they are consumed
+    def replay(self, paths, speed=0.0):
+        start = time.perf_counter()
+        self.replayed_seconds = 0.0
+        self.is_listening = True
+        self.audio_stop_event.clear()
+        # This thread plays the capture thread and the feeder plays the PortAudio callback, as in start_audio_capture
+        feeder = threading.Thread(target=self.feed_replay, args=(paths, speed), daemon=True)
+        feeder.start()
+        self.drain_capture_queue()
+        feeder.join()
+        if len(self.audio_ring) and not (self.flush_on_pauses and not self.vad.in_utterance):
+            self.dispatch_audio_buffer()
+        self.shutdown_workers(wait_for_partials=True)
+        self.report_replay(len(paths), self.replayed_seconds, time.perf_counter() - start)
+
+    # Feed each file through audio_callback in chunk_size blocks, then stop the capture loop
+    def feed_replay(self, paths, speed):
+        status = SimpleNamespace(input_overflow=False)
+        try:
+            for path in paths:
+                samplerate, samples = read_wav_mono(path)
+                self.wait_for_capture_queue()
+                self.samplerate = samplerate
+                self.vad = VoiceActivityDetector(samplerate, self.chunk_size)
+                self.audio_ring.clear()
+                self.last_dispatch_retained = 0
+                # A second of trailing silence lets the endpointer close the last utterance of the file
+                samples = np.concatenate([samples, np.zeros(samplerate, dtype=np.float32)])
+                file_start = time.perf_counter()
+                for offset in range(0, len(samples), self.chunk_size):
+                    block = samples[offset:offset + self.chunk_size]
+                    if speed:
+                        delay = file_start + offset / samplerate / speed - time.perf_counter()
+                        if delay > 0:
+                            time.sleep(delay)
+                    else:
+                        while len(self.capture_queue) >= self.capture_queue.capacity:
+                            time.sleep(0.001)
+                    self.audio_callback(block[:, np.newaxis], len(block), None, status)
+                self.replayed_seconds += len(samples) / samplerate
+            self.wait_for_capture_queue()
+        except Exception as e:
+            logging.exception("Replay failed.")
+            print(f"Replay failed: {e}")
+        finally:
+            self.audio_stop_event.set()
+
+    # Print throughput, per-utterance latency and the pipeline counters
+    def report_replay(self, files, audio_seconds, wall_seconds):
+        print(f"Replayed {files} file(s): {audio_seconds:.1f} s of audio in {wall_seconds:.2f} s "
+              f"({audio_seconds / wall_seconds:.1f}x real time)")
+        print(f"  {'utterance':>9} {'latency ms':>11}  text")
+        for utterance_id, seconds, text in self.utterance_latencies:
+            print(f"  {utterance_id:9} {1000 * seconds:11.0f}  {text}")
+        if self.utterance_latencies:
+            latencies = sorted(seconds for _, seconds, _ in self.utterance_latencies)
+            print(f"  End-of-speech-to-display latency: median {1000 * latencies[len(latencies) // 2]:.0f} ms, "
+                  f"p95 {1000 * latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]:.0f} ms, "
+                  f"max {1000 * latencies[-1]:.0f} ms")
+        print(f"  Segments delivered {len(self.utterance_latencies)}, dropped {self.recognition_backlog.dropped}, "
+              f"merged {self.recognition_backlog.merged}, skipped {self.recognition_reorder.skipped}; "
+              f"capture blocks dropped {self.capture_queue.dropped}")
+        print(f"  Recognizer: {self.recognizer_backend.stats.summary()}")
+        print(f"  Translator: {self.translation_backend.summary()}")
+        print(f"  Translation cache: {self.translation_cache.summary()}")
+        print(f"  Sentences: {self.sentence_memo_summary()}")
+        print(f"  Translation memory: {self.translation_memory.summary()}")
+
+
+# Local stand-in for the Google Translate page, answering over keep-alive HTTP/1.1
+class TranslateStandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes
+    connections = 0
+    delay = 0.0  # Seconds to stall before answering
+    slow_every = 0  # Stall every Nth request for slow_delay seconds (tail latency benchmark)
+    slow_delay = 0.0
+    requests = 0
+    counter_lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        TranslateStandInHandler.connections += 1
+
+    def do_GET(self):
+        with self.counter_lock:
+            TranslateStandInHandler.requests += 1
+            slow = self.slow_every and TranslateStandInHandler.requests % self.slow_every == 0
+        if self.delay or slow:
+            time.sleep(self.slow_delay if slow else self.delay)
+        query = parse_qs(urlparse(self.path).query)
+        # Like the Google page, a multi-line request comes back as one text node per line, separated by <br>
+        translation = "<br>".join(html.escape(f"[{query['tl'][0]}] {line}") for line in query["q"][0].split("\n"))
+        body = f'<html><body><div class="result-container">{translation}</div></body></html>'.encode("utf-8")
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting (timeout benchmark)
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Benchmark: per-call client overhead of a new GoogleTranslator per segment against pooled session clients
+def benchmark_translator_pool(calls=300):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TranslateStandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/m"
+
+    def new_client_per_call(text):
+        translator = GoogleTranslator(source="fr", target="en")
+        translator._base_url = url
+        return translator.translate(text)
+
+    pool = TranslatorPool(lambda source, target: SessionGoogleTranslator(source, target, base_url=url))
+
+    def pooled_client(text):
+        with pool.client("fr", "en") as translator:
+            return translator.translate(text)
+
+    print(f"Translator client overhead against a local HTTP stand-in, {calls} calls")
+    try:
+        for name, function in (("new GoogleTranslator per call", new_client_per_call),
+                               ("pooled session client", pooled_client)):
+            function("bonjour")
+            TranslateStandInHandler.connections = 0
+            start = time.perf_counter()
+            for i in range(calls):
+                function(f"phrase numéro {i}")
+            elapsed = time.perf_counter() - start
+            print(f"  {name:30} {1000 * elapsed / calls:.2f} ms per call, "
+                  f"{TranslateStandInHandler.connections} connections opened")
+        print(f"  Pool: {pool.created} client(s) created, {pool.reused} reuses")
+        print("  Against Google each avoided connection also saves a TLS handshake (typically 50-150 ms).")
+    finally:
+        pool.clear()
+        server.shutdown()
+        server.server_close()
+
+
+# Benchmark: time to batch translate the sample book (one request per segment) at different concurrency limits
+def benchmark_batch_translation(max_segments=120, latency=0.05):
+    with open(app_file("Book.txt"), encoding="utf-8") as f:
+        segments = list(iter_text_segments(f.read()))[:max_segments]
+    app = ReplayTranslatorApp(ScriptedRecognizer(), ScriptedTranslationBackend(latency), target_language="fr")
+    print(f"Batch translation of {len(segments)} segments, stand-in translator latency {1000 * latency:.0f} ms")
+    try:
+        baseline = None
+        for concurrency, rate_limit in ((1, None), (4, None), (8, None), (8, 20)):
+            app.translation_cache = TranslationCache(None)
+            start = time.perf_counter()
+            translated = app.translate_segments_concurrently(segments, "fr", concurrency, rate_limit, pack=False)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            in_order = all(result.endswith(" ".join(segment.split())) for result, segment in zip(translated, segments))
+            limit = f"{rate_limit}/s" if rate_limit else "none"
+            print(f"  concurrency {concurrency}, rate limit {limit:>5}: {elapsed:6.2f} s "
+                  f"({baseline / elapsed:.1f}x), in order: {in_order}")
+    finally:
+        app.shutdown_workers()
+
+
+# Benchmark: translation requests and time with and without request packing, for batch and text reading
+def benchmark_request_packing(latency=0.05):
+    with open(app_file("Book.txt"), encoding="utf-8") as f:
+        segments = list(iter_text_segments(f.read()))
+    app = ReplayTranslatorApp(ScriptedRecognizer(), ScriptedTranslationBackend(latency), target_language="fr")
+    print(f"Request packing on {len(segments)} segments of Book.txt, stand-in translator latency "
+          f"{1000 * latency:.0f} ms")
+    try:
+        for pack in (False, True):
+            app.translation_cache = TranslationCache(None)
+            app.translation_requests = 0
+            start = time.perf_counter()
+            translated = app.translate_segments_concurrently(segments, "fr", concurrency=4, pack=pack)
+            elapsed = time.perf_counter() - start
+            in_order = all(result.endswith(" ".join(segment.split())) for result, segment in zip(translated, segments))
+            print(f"  batch, packing {'on ' if pack else 'off'}: {app.translation_requests:4} requests, "
+                  f"{elapsed:5.2f} s, in order: {in_order}")
+        # Text reading: each segment is translated as it is read; packing translates the next ones ahead
+        app.text_segments = segments
+        for pack in (False, True):
+            app.translation_cache = TranslationCache(None)
+            app.translation_requests = 0
+            start = time.perf_counter()
+            for index, segment in enumerate(segments):
+                if pack:
+                    app.pack_upcoming_segments(index, "fr")
+                app.translate_text(segment.strip().replace("\n", " "), "fr")
+            elapsed = time.perf_counter() - start
+            print(f"  text reading, packing {'on ' if pack else 'off'}: {app.translation_requests:4} requests, "
+                  f"{elapsed:5.2f} s")
+        # The Google client against the HTTP stand-in, which answers packed requests with one text node per line
+        server = ThreadingHTTPServer(("127.0.0.1", 0), TranslateStandInHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        google = GoogleTranslationBackend(base_url=f"http://127.0.0.1:{server.server_port}/m")
+        app.translation_backend = google
+        app.translation_backends = OrderedDict([(google.name, google)])
+        try:
+            app.translation_cache = TranslationCache(None)
+            app.translation_requests = 0
+            translated = app.translate_segments_concurrently(segments, "fr", concurrency=4)
+            in_order = all(result.endswith(" ".join(segment.split())) for result, segment in zip(translated, segments))
+            print(f"  batch through the Google client, packing on: {app.translation_requests:4} requests, "
+                  f"in order: {in_order}")
+        finally:
+            google.reset()
+            server.shutdown()
+            server.server_close()
+    finally:
+        app.shutdown_workers()
+
+
+# Benchmark: failover from a stalling Google stand-in to a second backend, with per-backend latency and errors
+def benchmark_translation_failover(calls=10, timeout=0.3):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TranslateStandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    google = GoogleTranslationBackend(timeout=timeout, base_url=f"http://127.0.0.1:{server.server_port}/m")
+    fallback = ScriptedTranslationBackend(latency=0.01)
+    fallback.failover = True
+    app = ReplayTranslatorApp(ScriptedRecognizer(), google, target_language="fr")
+    app.translation_backends[fallback.name] = fallback
+    print(f"Translation failover, Google stand-in timeout {1000 * timeout:.0f} ms, {calls} calls per phase")
+    try:
+        for phase, delay in (("stand-in healthy", 0.0), ("stand-in stalled", 3 * timeout)):
+            TranslateStandInHandler.delay = delay
+            fallback_calls = fallback.stats.calls
+            start = time.perf_counter()
+            for i in range(calls):
+                app.send_translation(f"phrase {phase} {i}", "fr", "en")
+            elapsed = time.perf_counter() - start
+            answered_by_fallback = fallback.stats.calls - fallback_calls
+            print(f"  {phase}: {1000 * elapsed / calls:.0f} ms per call, "
+                  f"{answered_by_fallback}/{calls} answered by the fallback")
+        for backend in app.translation_failover_order():
+            print(f"  {backend.name}: {backend.summary()}")
+    finally:
+        TranslateStandInHandler.delay = 0.0
+        google.reset()
+        server.shutdown()
+        server.server_close()
+        app.shutdown_workers()
+
+
+# Benchmark: per-call latency with a Google stand-in that stalls every 25th request (with and without hedging),
+# then with the stand-in down (without and with the circuit breaker)
+def benchmark_translation_deadline(calls=100, outage_calls=20, slow_delay=0.5, timeout=1.0):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TranslateStandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    google = GoogleTranslationBackend(timeout=timeout, base_url=f"http://127.0.0.1:{server.server_port}/m")
+    fallback = ScriptedTranslationBackend(latency=0.01)
+    fallback.failover = True
+    app = ReplayTranslatorApp(ScriptedRecognizer(), google, target_language="fr")
+    app.translation_backends[fallback.name] = fallback
+    app.translation_deadline = 3.0
+
+    def run(label, calls):
+        latencies = []
+        for i in range(calls):
+            start = time.perf_counter()
+            app.send_translation(f"phrase {label} {i}", "fr", "en")
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        print(f"  {label:34} p50 {1000 * latencies[len(latencies) // 2]:5.0f} ms, "
+              f"p95 {1000 * latencies[int(0.95 * len(latencies))]:5.0f} ms, max {1000 * latencies[-1]:5.0f} ms, "
+              f"total {sum(latencies):5.1f} s")
+
+    print(f"Translation deadline, hedging and circuit breaker, deadline {app.translation_deadline:.0f} s, "
+          f"Google stand-in timeout {timeout:.0f} s")
+    try:
+        for _ in range(30):
+            app.send_translation("warm up", "fr", "en")
+        TranslateStandInHandler.slow_every, TranslateStandInHandler.slow_delay = 25, slow_delay
+        for hedge in (False, True):
+            google.hedge = hedge
+            run(f"every 25th stalls, hedging {'on' if hedge else 'off'}", calls)
+        TranslateStandInHandler.slow_every, TranslateStandInHandler.delay = 0, 2 * timeout
+        for threshold in (outage_calls + 1, 3):
+            google.breaker = CircuitBreaker(failure_threshold=threshold)
+            run(f"stand-in down, breaker {'on' if threshold == 3 else 'off'}", outage_calls)
+        for backend in app.translation_failover_order():
+            print(f"  {backend.name}: {backend.summary()}")
+    finally:
+        TranslateStandInHandler.delay = TranslateStandInHandler.slow_every = 0
+        google.reset()
+        server.shutdown()
+        server.server_close()
+        app.shutdown_workers()
+
+
+# Benchmark: time the GUI thread is blocked while reading the sample book, translating each segment when it is
+# reached (as before) against taking it from the translate-ahead prefetcher
+def benchmark_text_prefetch(max_segments=60, latency=0.3, pace=0.1):
+    with open(app_file("Book.txt"), encoding="utf-8") as f:
+        segments = list(iter_text_segments(f.read()))[:max_segments]
+    app = ReplayTranslatorApp(ScriptedRecognizer(), ScriptedTranslationBackend(latency), target_language="fr")
+    app.text_segments = segments
+    print(f"Text reading of {len(segments)} segments, stand-in translator latency {1000 * latency:.0f} ms, "
+          f"{1000 * pace:.0f} ms reading time per segment")
+    try:
+        for prefetch in (False, True):
+            app.translation_cache = TranslationCache(None)
+            app.text_prefetcher.reset(segments, 0)
+            blocked = []
+            start = time.perf_counter()
+            for index in range(len(segments)):
+                call_start = time.perf_counter()
+                if prefetch:
+                    # The GUI polls every 50 ms until the translation is ready, as process_next_text_segment does
+                    while app.text_prefetcher.take(index) is None:
+                        blocked.append(time.perf_counter() - call_start)
+                        time.sleep(0.05)
+                        call_start = time.perf_counter()
+                else:
+                    app.prefetch_segment_translation(segments, index)
+                blocked.append(time.perf_counter() - call_start)
+                time.sleep(pace)
+            elapsed = time.perf_counter() - start
+            print(f"  {'prefetch' if prefetch else 'translate when reached':22}: GUI blocked {sum(blocked):6.2f} s "
+                  f"in total, longest freeze {1000 * max(blocked):5.0f} ms, reading took {elapsed:5.2f} s")
+        print(f"  Prefetcher: {app.text_prefetcher.ready} segments ready when reached, "
+              f"{app.text_prefetcher.waited} waited for")
+    finally:
+        app.shutdown_workers()
+
+
+# Recognition-like variants of a sentence for the fuzzy translation memory benchmark
+def sentence_variants(sentence, previous, vocabulary, generator):
+    words = sentence.split()
+    stripped = "".join(c for c in sentence if c not in string.punctuation)
+    replaced = list(words)
+    position = int(generator.integers(len(words)))
+    replaced[position] = vocabulary[int(generator.integers(len(vocabulary)))]
+    repeated = list(words)
+    repeated.insert(position, words[position])
+    return {
+        "punctuation and case": stripped.lower(),
+        "overlap artefact": " ".join(previous.split()[-2:] + words),
+        "repeated word": " ".join(repeated),
+        "one word replaced": " ".join(replaced),
+    }
+
+
+# Benchmark: precision, recall and lookup time of the fuzzy translation memory on the sentences of the sample book
+# and the documentation (two thirds stored, the rest unseen), against a linear scan over all stored sentences
+def benchmark_translation_memory(paths=("Book.txt", "Readme.txt", "Summary of translator app.txt"),
+                                 thresholds=(0.6, 0.7, 0.8, 0.9)):
+    sentences = []
+    for path in paths:
+        with open(app_file(path), encoding="utf-8") as f:
+            sentences += [sentence for sentence in split_sentences(" ".join(f.read().split()))
+                          if len(sentence.split()) >= 5]
+    sentences = list(dict.fromkeys(sentences))
+    stored_sentences = [sentence for index, sentence in enumerate(sentences) if index % 3]
+    unseen = sentences[::3]
+    vocabulary = sorted({word for sentence in sentences for word in sentence.split() if word.isalpha()})
+    generator = np.random.default_rng(0)
+    queries = []  # (text, kind, expected translation or None)
+    for index, sentence in enumerate(stored_sentences):
+        previous = stored_sentences[index - 1] if index else ""
+        for kind, variant in sentence_variants(sentence, previous, vocabulary, generator).items():
+            queries.append((variant, kind, f"[fr] {sentence}"))
+    queries += [(sentence, "unseen sentence", None) for sentence in unseen]
+    print(f"Fuzzy translation memory: {len(stored_sentences)} stored sentences, {len(queries)} queries "
+          f"({len(unseen)} of them unseen sentences)")
+    for threshold in thresholds:
+        memory = TranslationMemory(threshold=threshold)
+        for sentence in stored_sentences:
+            memory.add("en", "fr", sentence, f"[fr] {sentence}")
+        correct, wrong, found = 0, 0, {}
+        latencies = []
+        for text, kind, expected in queries:
+            start = time.perf_counter()
+            translation = memory.get("en", "fr", text)
+            latencies.append(time.perf_counter() - start)
+            if translation is None:
+                continue
+            if translation == expected:
+                correct += 1
+                found[kind] = found.get(kind, 0) + 1
+            else:
+                wrong += 1
+        positives = sum(1 for _, _, expected in queries if expected is not None)
+        precision = 100.0 * correct / (correct + wrong) if correct + wrong else 100.0
+        latencies.sort()
+        print(f"  threshold {threshold:.1f}: precision {precision:5.1f}%, recall {100.0 * correct / positives:5.1f}%, "
+              f"lookup mean {1e6 * sum(latencies) / len(latencies):4.0f} us, "
+              f"p95 {1e6 * latencies[int(0.95 * len(latencies))]:4.0f} us")
+        kinds = sorted({kind for _, kind, expected in queries if expected is not None})
+        print("    recall by variant: " + ", ".join(
+            f"{kind} {100.0 * found.get(kind, 0) / len(stored_sentences):.0f}%" for kind in kinds))
+    # Linear scan baseline: exact Jaccard similarity against every stored sentence
+    stored_shingles = [(memory.shingles(sentence), sentence) for sentence in stored_sentences]
+    start = time.perf_counter()
+    for text, _, _ in queries[:200]:
+        shingles = memory.shingles(text)
+        max(len(shingles & other) / len(shingles | other) for other, _ in stored_shingles)
+    print(f"  linear scan over {len(stored_sentences)} sentences: "
+          f"{1e6 * (time.perf_counter() - start) / 200:.0f} us per lookup")
+
+
+# Sentences in many languages written for the benchmarks, not taken from the identification model
+BENCHMARK_SENTENCES = {
+    "en": ["The weather was cold, so we stayed inside and read books all afternoon.",
+           "Could you tell me where the nearest train station is?"],
+    "fr": ["Il faisait froid, alors nous sommes restés à la maison pour lire tout l'après-midi.",
+           "Pouvez-vous me dire où se trouve la gare la plus proche ?"],
+    "de": ["Es war kalt, deshalb sind wir den ganzen Nachmittag zu Hause geblieben und haben gelesen.",
+           "Können Sie mir sagen, wo der nächste Bahnhof ist?"],
+    "es": ["Hacía frío, así que nos quedamos en casa leyendo toda la tarde.",
+           "¿Podría decirme dónde está la estación de tren más cercana?"],
+    "it": ["Faceva freddo, quindi siamo rimasti a casa a leggere tutto il pomeriggio.",
+           "Mi può dire dov'è la stazione più vicina?"],
+    "pt": ["Estava frio, então ficamos em casa lendo a tarde toda.",
+           "Você pode me dizer onde fica a estação de trem mais próxima?"],
+    "nl": ["Het was koud, dus we zijn de hele middag binnen gebleven om te lezen.",
+           "Kunt u mij vertellen waar het dichtstbijzijnde station is?"],
+    "sv": ["Det var kallt, så vi stannade inne och läste hela eftermiddagen.",
+           "Kan du säga mig var närmaste tågstation ligger?"],
+    "da": ["Det var koldt, så vi blev inde og læste hele eftermiddagen.",
+           "Kan du fortælle mig, hvor den nærmeste togstation er?"],
+    "no": ["Det var kaldt, så vi ble inne og leste hele ettermiddagen.",
+           "Kan du fortelle meg hvor nærmeste togstasjon er?"],
+    "fi": ["Oli kylmä, joten pysyimme sisällä ja luimme koko iltapäivän.",
+           "Voisitko kertoa, missä on lähin rautatieasema?"],
+    "pl": ["Było zimno, więc zostaliśmy w domu i czytaliśmy przez całe popołudnie.",
+           "Czy może mi pan powiedzieć, gdzie jest najbliższa stacja kolejowa?"],
+    "cs": ["Byla zima, tak jsme zůstali doma a celé odpoledne jsme četli.",
+           "Můžete mi říct, kde je nejbližší nádraží?"],
+    "hu": ["Hideg volt, ezért egész délután otthon maradtunk és olvastunk.",
+           "Meg tudná mondani, hol van a legközelebbi vasútállomás?"],
+    "ro": ["Era frig, așa că am rămas în casă și am citit toată după-amiaza.",
+           "Îmi puteți spune unde este cea mai apropiată gară?"],
+    "tr": ["Hava soğuktu, bu yüzden bütün öğleden sonra evde kalıp kitap okuduk.",
+           "Bana en yakın tren istasyonunun nerede olduğunu söyleyebilir misiniz?"],
+    "id": ["Cuacanya dingin, jadi kami tinggal di rumah dan membaca sepanjang sore.",
+           "Bisakah Anda memberi tahu saya di mana stasiun kereta terdekat?"],
+    "hr": ["Bilo je hladno, pa smo cijelo poslijepodne ostali kod kuće i čitali.",
+           "Možete li mi reći gdje je najbliža željeznička stanica?"],
+    "ru": ["Было холодно, поэтому мы весь день оставались дома и читали книги.",
+           "Не могли бы вы сказать, где находится ближайший вокзал?"],
+    "uk": ["Було холодно, тому ми весь день залишалися вдома і читали книжки.",
+           "Чи не могли б ви сказати, де знаходиться найближчий вокзал?"],
+    "bg": ["Беше студено, затова останахме вкъщи и четохме цял следобед.",
+           "Можете ли да ми кажете къде е най-близката гара?"],
+    "ar": ["كان الجو باردا لذلك بقينا في البيت وقرأنا الكتب طوال فترة الظهيرة.",
+           "هل يمكنك أن تخبرني أين تقع أقرب محطة قطار؟"],
+    "fa": ["هوا سرد بود برای همین تمام بعدازظهر در خانه ماندیم و کتاب خواندیم.",
+           "می‌توانید به من بگویید نزدیک‌ترین ایستگاه قطار کجاست؟"],
+    "hi": ["ठंड थी, इसलिए हम पूरी दोपहर घर पर रहे और किताबें पढ़ीं।",
+           "क्या आप मुझे बता सकते हैं कि सबसे नज़दीकी रेलवे स्टेशन कहाँ है?"],
+    "el": ["Έκανε κρύο, οπότε μείναμε μέσα και διαβάζαμε όλο το απόγευμα."],
+    "ja": ["寒かったので、午後はずっと家で本を読んでいました。"],
+    "zh-CN": ["天气很冷，所以我们整个下午都待在家里看书。"],
+    "zh-TW": ["天氣很冷，所以我們整個下午都待在家裡看書。"],
+    "ko": ["날씨가 추워서 우리는 오후 내내 집에서 책을 읽었습니다."],
+    "th": ["อากาศหนาว เราจึงอยู่บ้านอ่านหนังสือทั้งบ่าย"],
+    "iw": ["היה קר, אז נשארנו בבית וקראנו כל אחר הצהריים."],
+}
+
+
+# Benchmark: accuracy and speed of offline language identification on sample sentences in 31 languages and on the
+# English sample book, and how many of them would be sent for translation with the wrong source language
+def benchmark_language_identification(repeats=20):
+    samples = dict(BENCHMARK_SENTENCES)
+    with open(app_file("Book.txt"), encoding="utf-8") as f:
+        samples["en"] = samples["en"] + [sentence for sentence in split_sentences(" ".join(f.read().split()))
+                                         if len(sentence.split()) >= 4]
+    languages = {"en", "zh-CN", "zh-TW", "iw", "yi"} | set(SINGLE_LANGUAGE_SCRIPTS.values())
+    languages |= {code for words in LANGUAGE_ID_WORDS.values() for code in words}
+    identifier = LanguageIdentifier(languages)
+    correct, undecided, wrong = 0, 0, []
+    for code, sentences in samples.items():
+        for sentence in sentences:
+            detected = identifier._decide(" ".join(sentence.split()).casefold())
+            if detected == code:
+                correct += 1
+            elif detected is None:
+                undecided += 1
+            else:
+                wrong.append(f"{code} as {detected}")
+    total = correct + undecided + len(wrong)
+    other = total - len(samples["en"])
+    print(f"Language identification of {total} sentences ({len(samples)} languages, "
+          f"{len(samples['en'])} of them English)")
+    print(f"  correct {correct}, undecided {undecided}, wrong {len(wrong)}"
+          + (f" ({', '.join(wrong)})" if wrong else ""))
+    all_sentences = [sentence for sentences in samples.values() for sentence in sentences]
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for sentence in all_sentences:
+            identifier._decide(" ".join(sentence.split()).casefold())
+    print(f"  {1e6 * (time.perf_counter() - start) / repeats / total:.0f} us per sentence, ", end="")
+    for sentence in all_sentences:
+        identifier.identify(sentence)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for sentence in all_sentences:
+            identifier.identify(sentence)
+    print(f"{1e6 * (time.perf_counter() - start) / repeats / total:.1f} us from the session cache")
+    routed = sum(1 for code, sentences in samples.items() if code != "en"
+                 for sentence in sentences if identifier._decide(" ".join(sentence.split()).casefold(), "en") == code)
+    print(f"  With English selected, {other} sentences would be sent with the wrong source language; "
+          f"{routed} of them are now sent with the right one")
+
+
+# Previous two-pass segmenter (split_text_with_fallback, then merge_short_segments), kept as the baseline of the
+# EPUB reading and segmentation benchmarks
+def merge_short_segments(segments, min_word_count=3, min_char_threshold=4):
+    """
+    Merges short text segments to avoid poor translation results.
+    """
+    segments = [s.strip() for s in segments if s.strip()]
+    if not segments:
+        return segments
+
+    def is_too_short(seg):
+        # Check if segment has fewer than the minimum word count
+        if len(seg.split()) < min_word_count:
+            return True
+        # Also check if segment is a single short word
+        token = seg.replace(".", "")
+        if " " not in seg and token.isalpha() and len(token) <= min_char_threshold:
+            return True
+        return False
+
+    merged = []
+    for seg in segments:
+        if is_too_short(seg):
+            if merged:
+                merged[-1] += " " + seg
+            else:
+                merged.append(seg)
+        else:
+            merged.append(seg)
+
+    final = []
+    i = 0
+    while i < len(merged):
+        seg = merged[i]
+        if is_too_short(seg) and i + 1 < len(merged):
+            new_seg = seg + " " + merged[i + 1]
+            final.append(new_seg)
+            i += 2
+        else:
+            final.append(seg)
+            i += 1
+    return final
+
+
+# Function to split text into segments using punctuation as a delimiter
+def split_text_with_fallback(text, fallback_word_count=300):
+    """
+    Splits text into segments based on punctuation. If a segment is too long,
+    it is further split by word count.
+    """
+    raw_segments = re.split(r'(?<=[.!?])\s+', text)
+    new_segments = []
+    for seg in raw_segments:
+        words = seg.split()
+        if len(words) > fallback_word_count:
+            for i in range(0, len(words), fallback_word_count):
+                new_segments.append(" ".join(words[i:i + fallback_word_count]))
+        else:
+            new_segments.append(seg)
+    return new_segments
+
+
+# Write a minimal EPUB with the given chapters, each a list of paragraphs
+def write_synthetic_epub(path, chapters):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as book:
+        book.writestr(zipfile.ZipInfo("mimetype"), "application/epub+zip")
+        book.writestr("META-INF/container.xml",
+                      '<?xml version="1.0"?><container version="1.0" '
+                      'xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>'
+                      '<rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>'
+                      '</rootfiles></container>')
+        items = []
+        refs = []
+        for number, paragraphs in enumerate(chapters, 1):
+            body = "".join(f"<p>{html.escape(paragraph)}</p>\n" for paragraph in paragraphs)
+            book.writestr(f"OEBPS/chapter{number}.xhtml",
+                          f'<?xml version="1.0" encoding="utf-8"?>\n<html xmlns="http://www.w3.org/1999/xhtml">'
+                          f'<head><title>Chapter {number}</title></head><body><h1>Chapter {number}</h1>'
+                          f'{body}</body></html>')
+            items.append(f'<item id="c{number}" href="chapter{number}.xhtml" media-type="application/xhtml+xml"/>')
+            refs.append(f'<itemref idref="c{number}"/>')
+        book.writestr("OEBPS/content.opf",
+                      '<?xml version="1.0" encoding="utf-8"?><package xmlns="http://www.idpf.org/2007/opf" '
+                      'version="3.0" unique-identifier="id"><metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+                      '<dc:identifier id="id">synthetic</dc:identifier><dc:title>Synthetic</dc:title>'
+                      f'<dc:language>en</dc:language></metadata><manifest>{"".join(items)}</manifest>'
+                      f'<spine>{"".join(refs)}</spine></package>')
+
+
+# Benchmark: time until the first segment can be shown, total load time and peak memory, for the whole-book
+# extraction against the chapter-by-chapter reader
+def benchmark_epub_reading(chapter_counts=(20, 200), path="Book.txt"):
+    # Only the baseline uses these
+    from ebooklib import epub
+    from bs4 import BeautifulSoup
+
+    with open(app_file(path), "r", encoding="utf-8") as f:
+        paragraphs = [line.strip() for line in f if line.strip()]
+
+    # The previous reader: extract the whole book with ebooklib and BeautifulSoup, then split it
+    def whole_book(epub_path):
+        book = epub.read_epub(epub_path)
+        full_text = ""
+        for item in book.get_items():
+            if isinstance(item, epub.EpubHtml):
+                text = BeautifulSoup(item.get_content(), "html.parser").get_text(separator="\n").strip()
+                if text:
+                    full_text += text + "\n\n"
+        raw_segments = split_text_with_fallback(full_text, fallback_word_count=300)
+        yield from merge_short_segments(raw_segments, min_word_count=3, min_char_threshold=4)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for count in chapter_counts:
+            epub_path = os.path.join(directory, f"book{count}.epub")
+            # Chapters of about 60 KB of text each, as in a typical novel
+            write_synthetic_epub(epub_path, [paragraphs * 8] * count)
+            print(f"{count} chapters, {os.path.getsize(epub_path) / 1024:.0f} KiB EPUB")
+            for name, reader in (("ebooklib + BeautifulSoup", whole_book), ("chapter by chapter", iter_epub_segments)):
+                start = time.perf_counter()
+                segments = reader(epub_path)
+                next(segments)
+                first = time.perf_counter() - start
+                total = 1 + sum(1 for _ in segments)
+                elapsed = time.perf_counter() - start
+                # Memory is measured in a separate run because tracing slows everything down
+                tracemalloc.start()
+                for _ in reader(epub_path):
+                    pass
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"  {name:25}: first segment {1000 * first:7.1f} ms, all {total} segments "
+                      f"{1000 * elapsed:7.0f} ms, peak memory {peak / 2 ** 20:6.1f} MiB")
+
+
+# Benchmark: segmentation throughput and segment sizes of the two-pass splitter against the single-pass
+# segmenter, on the sample book and on text in many languages and scripts
+def benchmark_segmentation(corpus_bytes=4_000_000, repeats=3):
+    with open(app_file("Book.txt"), encoding="utf-8") as f:
+        book = f.read()
+    paragraphs = []
+    for code, sentences in BENCHMARK_SENTENCES.items():
+        separator = "" if code in ("ja", "zh-CN", "zh-TW", "th") else " "
+        paragraphs.append(separator.join(sentences * 30))
+    corpora = {"Book.txt": book, "multilingual": "\n\n".join(paragraphs)}
+
+    def two_pass(text):
+        return merge_short_segments(split_text_with_fallback(text, fallback_word_count=300),
+                                    min_word_count=3, min_char_threshold=4)
+
+    for name, text in corpora.items():
+        text = text * max(1, corpus_bytes // len(text.encode("utf-8")))
+        size = len(text.encode("utf-8")) / 1e6
+        print(f"{name}: {size:.1f} MB")
+        for label, segmenter in (("two passes", two_pass), ("single pass", lambda t: list(iter_text_segments(t)))):
+            best = None
+            for _ in range(repeats):
+                start = time.perf_counter()
+                segments = segmenter(text)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"  {label:12}: {size / best:6.1f} MB/s, {len(segments)} segments, "
+                  f"longest {max(len(segment) for segment in segments)} characters")
+
+
+# Benchmark: opening a large text file by reading and splitting all of it against the memory-mapped segments:
+# time until the first segment can be shown, time to split the whole file, Python memory and random access
+def benchmark_mapped_text(size_mb=50, lookups=2000, path="Book.txt"):
+    with open(app_file(path), "r", encoding="utf-8") as f:
+        book = f.read()
+
+    def read_all(text_path):
+        with open(text_path, "r", encoding="utf-8") as f:
+            segments = list(iter_text_segments(f.read()))
+        return segments, iter(segments)
+
+    def mapped(text_path):
+        segments = MappedTextSegments(text_path)
+        return segments, segments.scan()
+
+    with tempfile.TemporaryDirectory() as directory:
+        text_path = os.path.join(directory, "large.txt")
+        with open(text_path, "w", encoding="utf-8") as f:
+            for _ in range(size_mb * 2 ** 20 // len(book.encode("utf-8"))):
+                f.write(book)
+        print(f"{os.path.getsize(text_path) / 2 ** 20:.0f} MiB text file")
+        rng = np.random.default_rng(0)
+        for name, opener in (("read and split all", read_all), ("memory-mapped", mapped)):
+            start = time.perf_counter()
+            segments, loader = opener(text_path)
+            next(loader)
+            first = time.perf_counter() - start
+            for _ in loader:
+                pass
+            elapsed = time.perf_counter() - start
+            indexes = rng.integers(0, len(segments), lookups)
+            start = time.perf_counter()
+            for index in indexes:
+                segments[int(index)]
+            lookup = (time.perf_counter() - start) / lookups
+            start = time.perf_counter()
+            for index in range(len(segments) // 2, len(segments) // 2 + lookups):
+                segments[index]
+            sequential = (time.perf_counter() - start) / lookups
+            del segments, loader
+            # Memory is measured in a separate run because tracing slows everything down
+            tracemalloc.start()
+            segments, loader = opener(text_path)
+            for _ in loader:
+                pass
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            del segments, loader
+            print(f"  {name:18}: first segment {1000 * first:7.1f} ms, all {1000 * elapsed:6.0f} ms, "
+                  f"peak Python memory {peak / 2 ** 20:6.1f} MiB, random segment {1e6 * lookup:7.1f} us, "
+                  f"next segment {1e6 * sequential:4.1f} us")
+
+
+# Benchmarks that can be run from the command line with --benchmark NAME
+BENCHMARKS = {
+    "resample": benchmark_resampling,
+    "overlap": benchmark_overlap_removal,
+    "translator-pool": benchmark_translator_pool,
+    "batch": benchmark_batch_translation,
+    "packing": benchmark_request_packing,
+    "failover": benchmark_translation_failover,
+    "deadline": benchmark_translation_deadline,
+    "prefetch": benchmark_text_prefetch,
+    "fuzzy": benchmark_translation_memory,
+    "langid": benchmark_language_identification,
+    "epub": benchmark_epub_reading,
+    "segment": benchmark_segmentation,
+    "mmap": benchmark_mapped_text,
+}
+
+
 # Main program execution: create the main window and run the application loop.
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Real-Time Language Translator")
+    parser.add_argument("--benchmark", choices=sorted(BENCHMARKS), help="run a benchmark instead of the GUI")
+    parser.add_argument("--replay", nargs="+", metavar="WAV",
+                        help="replay WAV files through the pipeline with scripted recognition and translation")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="replay speed: 1 is real time, 0 (default) is as fast as possible")
+    parser.add_argument("--script", help="text file with one scripted recognition result per line")
+    parser.add_argument("--recognizer-latency", type=float, default=0.5, help="stand-in recognizer latency (s)")
+    parser.add_argument("--translator-latency", type=float, default=0.1, help="stand-in translator latency (s)")
+    parser.add_argument("--target", default="fr", help="target language code for the replay")
+    parser.add_argument("--backlog-policy", default=BACKLOG_DROP_OLDEST,
+                        choices=[BACKLOG_MERGE, BACKLOG_DROP_OLDEST, BACKLOG_BLOCK])
+    args = parser.parse_args()
+    if args.benchmark:
+        BENCHMARKS[args.benchmark]()
+        sys.exit()
+    if args.replay:
+        script = None
+        if args.script:
+            with open(args.script, encoding="utf-8") as f:
+                script = [line.strip() for line in f if line.strip()]
+        replay_app = ReplayTranslatorApp(ScriptedRecognizer(script, args.recognizer_latency),
+                                         ScriptedTranslationBackend(args.translator_latency), args.target,
+                                         args.backlog_policy)
+        replay_app.replay(args.replay, args.speed)
+        sys.exit()
     try:
         root = tk.Tk()
         app = TranslatorApp(root)
@@ -1923,6 +5574,7 @@ if __name__ == "__main__":
         logging.critical(f"Unhandled exception: {e}", exc_info=True)
     finally:
         if 'app' in locals():
-            app.executor.shutdown(wait=True)
+            app.shutdown_workers()
             logging.info("ThreadPoolExecutor shutdown in finally block.")
+            app.translation_cache.close()
             app.stop_tts_loop()
@@ -0,0 +1,141 @@
+import threading
+
+from main import (BACKLOG_BLOCK, BACKLOG_DROP_OLDEST, BACKLOG_MERGE, RecognitionBacklog, RecognitionJob,
+                  ReorderBuffer, ScriptedRecognizer)
+
+SAMPLE_RATE = 16000
+
+
+# A job of the given length in seconds, sharing overlap_samples with the one before it
+def make_job(utterance_id, seconds=1.0, overlap_samples=0, language="en-US"):
+    audio_bytes = bytes(2 * int(seconds * SAMPLE_RATE))
+    return RecognitionJob(language, "fr", audio_bytes, SAMPLE_RATE, overlap_samples, utterance_id)
+
+
+def make_backlog(capacity, policy, **kwargs):
+    reorder = ReorderBuffer(lambda sequence, result: None)
+    return RecognitionBacklog(capacity, policy, reorder.next_sequence, **kwargs)
+
+
+def test_reorder_buffer_delivers_in_sequence_order():
+    delivered = []
+    reorder = ReorderBuffer(lambda sequence, result: delivered.append((sequence, result)))
+    sequences = [reorder.next_sequence() for _ in range(3)]
+    reorder.complete(sequences[2], "c")
+    reorder.complete(sequences[1], "b")
+    assert delivered == []
+    reorder.complete(sequences[0], "a")
+    assert delivered == [(0, "a"), (1, "b"), (2, "c")]
+
+
+def test_reorder_buffer_skips_a_stalled_result_and_drops_it_when_late():
+    delivered = []
+    reorder = ReorderBuffer(lambda sequence, result: delivered.append((sequence, result)), timeout=0.0)
+    first, second = reorder.next_sequence(), reorder.next_sequence()
+    reorder.expire()
+    assert delivered == []  # Nothing is waiting behind the first result yet
+    reorder.complete(second, "b")
+    reorder.expire()
+    assert delivered == [(first, None), (second, "b")]
+    assert reorder.skipped == 1
+    reorder.complete(first, "a")
+    assert delivered == [(first, None), (second, "b")]
+
+
+def test_reorder_buffer_waits_for_a_result_within_the_timeout():
+    delivered = []
+    reorder = ReorderBuffer(lambda sequence, result: delivered.append((sequence, result)), timeout=60.0)
+    first, second = reorder.next_sequence(), reorder.next_sequence()
+    reorder.complete(second, "b")
+    reorder.expire()
+    assert delivered == [] and reorder.skipped == 0
+    reorder.complete(first, "a")
+    assert delivered == [(first, "a"), (second, "b")]
+
+
+def test_backlog_drop_oldest_keeps_the_newest_segments():
+    backlog = make_backlog(2, BACKLOG_DROP_OLDEST)
+    for utterance_id in range(3):
+        backlog.put(make_job(utterance_id, overlap_samples=100))
+    assert backlog.dropped == 1
+    jobs = [backlog.get() for _ in range(2)]
+    assert [job.utterance_id for _, job in jobs] == [1, 2]
+    # The first segment kept no longer overlaps a segment that will be shown
+    assert jobs[0][1].overlap_samples == 0
+    # Sequence numbers are taken when a worker picks a segment up, so the drop leaves no gap
+    assert [sequence for sequence, _ in jobs] == [0, 1]
+
+
+def test_backlog_merge_joins_the_new_segment_onto_the_newest_waiting_one():
+    backlog = make_backlog(1, BACKLOG_MERGE)
+    backlog.put(make_job(0, seconds=1.0))
+    backlog.put(make_job(1, seconds=1.0, overlap_samples=1600))
+    assert backlog.merged == 1 and backlog.dropped == 0 and len(backlog) == 1
+    _, job = backlog.get()
+    assert job.utterance_id == 1
+    assert len(job.audio_bytes) == 2 * (2 * SAMPLE_RATE - 1600)
+
+
+def test_backlog_merge_drops_the_oldest_when_the_merge_would_be_too_long():
+    backlog = make_backlog(1, BACKLOG_MERGE, max_merged_seconds=1.5)
+    backlog.put(make_job(0, seconds=1.0))
+    backlog.put(make_job(1, seconds=1.0))
+    assert backlog.merged == 0 and backlog.dropped == 1
+    assert backlog.get()[1].utterance_id == 1
+
+
+def test_backlog_merge_never_joins_segments_in_different_languages():
+    backlog = make_backlog(1, BACKLOG_MERGE)
+    backlog.put(make_job(0, language="en-US"))
+    backlog.put(make_job(1, language="de-DE"))
+    assert backlog.merged == 0 and backlog.dropped == 1
+
+
+def test_backlog_block_waits_for_a_free_slot():
+    backlog = make_backlog(1, BACKLOG_BLOCK)
+    backlog.put(make_job(0))
+    producer = threading.Thread(target=backlog.put, args=(make_job(1),))
+    producer.start()
+    producer.join(0.1)
+    assert producer.is_alive()
+    assert backlog.get()[1].utterance_id == 0
+    producer.join(5)
+    assert not producer.is_alive()
+    assert backlog.get()[1].utterance_id == 1
+    assert backlog.dropped == 0 and backlog.merged == 0
+
+
+def test_backlog_close_releases_a_blocked_producer_and_the_workers():
+    backlog = make_backlog(1, BACKLOG_BLOCK)
+    backlog.put(make_job(0))
+    producer = threading.Thread(target=backlog.put, args=(make_job(1),))
+    producer.start()
+    producer.join(0.1)
+    backlog.close()
+    producer.join(5)
+    assert not producer.is_alive()
+    backlog.clear()
+    assert backlog.get() is None
+
+
+def test_scripted_recognition_through_backlog_and_reorder_buffer():
+    delivered = []
+    reorder = ReorderBuffer(lambda sequence, result: delivered.append(result))
+    backlog = RecognitionBacklog(4, BACKLOG_DROP_OLDEST, reorder.next_sequence)
+    recognizer = ScriptedRecognizer(script=["one", "two", "three"])
+    for utterance_id in range(3):
+        backlog.put(make_job(utterance_id))
+    backlog.close()
+    picked = []
+    while True:
+        item = backlog.get()
+        if item is None:
+            break
+        sequence, job = item
+        job.recognized_text = recognizer.recognize(job.audio_bytes, job.sample_rate, job.spoken_language_code)
+        picked.append((sequence, job.recognized_text))
+    # Complete the recognitions out of order, as parallel workers would
+    for sequence, text in reversed(picked):
+        reorder.complete(sequence, text)
+    assert delivered == ["one", "two", "three"]
+    assert recognizer.stats.calls == 3
@@ -0,0 +1,149 @@
+import pytest
+
+from main import (MappedTextSegments, ScriptedTranslationBackend, iter_text_segments, longest_common_run,
+                  remove_text_overlap, unpack_translations)
+
+
+def test_unpack_translations_splits_a_packed_response_per_line():
+    lines = ["The first sentence of the batch.", "A second one.", "And a third, somewhat longer sentence here."]
+    response = ScriptedTranslationBackend().request("\n".join(lines), "en", "fr")
+    assert unpack_translations(response, lines) == [f"[fr] {line}" for line in lines]
+
+
+def test_unpack_translations_ignores_blank_lines_in_the_response():
+    assert unpack_translations("\nun\n\n deux \n", ["one", "two"]) == ["un", "deux"]
+
+
+def test_unpack_translations_refuses_a_different_line_count():
+    assert unpack_translations("un deux", ["one", "two"]) is None
+    assert unpack_translations("", ["one"]) is None
+
+
+def test_unpack_translations_refuses_lines_out_of_proportion():
+    # The same line count, but the first two long lines were merged and the third one split
+    lines = ["This is the first long sentence here.", "This is the second long sentence here.",
+             "This is the third long sentence here."]
+    response = ("Ceci est la première. Ceci est la deuxième longue phrase ici.\n"
+                "Ceci\nest la troisième longue phrase ici.")
+    assert unpack_translations(response, lines) is None
+
+
+def test_longest_common_run():
+    assert longest_common_run(list("abcdefg"), list("xxcdefyy")) == (2, 2, 4)
+    assert longest_common_run(list("abc"), list("xyz")) == (0, 0, 0)
+    assert longest_common_run(["a"], ["a"]) == (0, 0, 0)  # Shorter than the seed
+
+
+def test_longest_common_run_finds_the_run_near_the_end_of_repetitive_text():
+    first = ["la"] * 1000 + ["fin", "du", "texte"]
+    second = ["la", "fin", "du", "texte", "suite"]
+    assert longest_common_run(first, second) == (999, 0, 4)
+
+
+def test_remove_text_overlap_drops_the_repeated_tail():
+    assert remove_text_overlap("brown fox jumps over the dog", "the quick brown fox") == "jumps over the dog"
+    assert remove_text_overlap("Brown Fox jumps", "the quick brown fox") == "jumps"
+
+
+def test_remove_text_overlap_keeps_text_without_a_long_enough_overlap():
+    assert remove_text_overlap("completely different words", "the quick brown fox") == "completely different words"
+    assert remove_text_overlap("a b c", "x a b") == "a b c"  # Shorter than min_chars
+    assert remove_text_overlap("anything", "") == "anything"
+
+
+def test_remove_text_overlap_in_a_script_without_spaces():
+    assert remove_text_overlap("良い天気ですね。散歩しましょう", "今日は良い天気です") == "ね。散歩しましょう"
+
+
+def test_iter_text_segments_joins_a_short_first_segment_onto_the_next():
+    text = "Chapter 1. It was a dark and stormy night. The end came soon after that."
+    assert list(iter_text_segments(text)) == ["Chapter 1. It was a dark and stormy night.",
+                                              "The end came soon after that."]
+
+
+def test_iter_text_segments_joins_a_short_segment_onto_the_one_before():
+    text = "It was a dark and stormy night. Yes. The end came soon after that."
+    assert list(iter_text_segments(text)) == ["It was a dark and stormy night. Yes.",
+                                              "The end came soon after that."]
+
+
+def test_iter_text_segments_cuts_long_sentences():
+    segments = list(iter_text_segments(" ".join(["word"] * 25) + ".", fallback_word_count=10))
+    assert [len(segment.split()) for segment in segments] == [10, 10, 5]
+    segments = list(iter_text_segments(" ".join(["abcdefghij"] * 6), fallback_chars=40))
+    assert segments == [" ".join(["abcdefghij"] * 3)] * 2
+
+
+def test_iter_text_segments_in_a_script_without_spaces():
+    assert list(iter_text_segments("今日は良い天気です。散歩しましょう。はい。")) == ["今日は良い天気です。",
+                                                                                 "散歩しましょう。はい。"]
+
+
+def test_iter_text_segments_of_empty_text():
+    assert list(iter_text_segments("")) == []
+    assert list(iter_text_segments(" \n\n ")) == []
+
+
+# Write text to a file and map it with small blocks, so that most segments sit near a block edge
+def mapped(tmp_path, data, block_bytes=64, cached_blocks=2):
+    path = tmp_path / "book.txt"
+    path.write_bytes(data)
+    segments = MappedTextSegments(str(path), block_bytes=block_bytes, cached_blocks=cached_blocks)
+    scanned = list(segments.scan())
+    return segments, scanned
+
+
+PARAGRAPHS = [f"Paragraph {number} starts here. It has a second sentence, and a third one too!"
+              for number in range(12)]
+
+
+@pytest.mark.parametrize("line_end", ["\n", "\r\n", "\r"])
+def test_mapped_segments_keep_every_word_across_block_edges(tmp_path, line_end):
+    text = (line_end * 2).join(PARAGRAPHS)
+    segments, scanned = mapped(tmp_path, text.encode("utf-8"))
+    assert " ".join(scanned).split() == text.split()
+    assert not any("\r" in segment for segment in scanned)
+    segments.close()
+
+
+def test_mapped_segments_index_like_a_list_after_cache_eviction(tmp_path):
+    segments, scanned = mapped(tmp_path, "\n\n".join(PARAGRAPHS).encode("utf-8"), cached_blocks=1)
+    assert len(segments) == len(scanned)
+    assert [segments[index] for index in range(len(segments))] == scanned
+    assert segments[-1] == scanned[-1]
+    assert segments[3:7] == scanned[3:7]
+    assert list(segments) == scanned
+    with pytest.raises(IndexError):
+        segments[len(scanned)]
+    segments.close()
+
+
+def test_mapped_segments_of_a_single_line_without_separators(tmp_path):
+    text = "x" * 300
+    segments, scanned = mapped(tmp_path, text.encode("utf-8"))
+    assert "".join(scanned) == text
+    segments.close()
+
+
+def test_mapped_segments_never_cut_a_character_in_two(tmp_path):
+    # Three-byte characters without spaces or sentence ends, so blocks end at a character start
+    text = "天気" * 100
+    segments, scanned = mapped(tmp_path, text.encode("utf-8"))
+    assert "".join(scanned) == text
+    text = "。".join(["今日は良い天気です"] * 20) + "。"
+    segments, scanned = mapped(tmp_path, text.encode("utf-8"))
+    assert "".join(scanned) == text
+    segments.close()
+
+
+def test_mapped_segments_of_an_empty_file(tmp_path):
+    segments, scanned = mapped(tmp_path, b"")
+    assert scanned == [] and len(segments) == 0
+    segments.close()
+
+
+def test_mapped_segments_refuse_a_file_that_is_not_utf8(tmp_path):
+    path = tmp_path / "book.txt"
+    path.write_bytes(("It was a dark and stormy night. " * 100 + "Café.").encode("cp1252"))
+    with pytest.raises(UnicodeDecodeError):
+        MappedTextSegments(str(path), block_bytes=64)